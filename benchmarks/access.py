@@ -0,0 +1,260 @@
+import sys
+import json
+import time
+import platform
+import argparse
+from datetime import datetime
+
+import pymongo
+
+from src.endlessdb import (
+    EndlessConfiguration,
+    EndlessDatabase
+)
+
+class BenchmarkConfiguration(EndlessConfiguration):
+    
+    config = "tests/config.yml"
+    
+    def override(self):
+        self.CONFIG_YML = BenchmarkConfiguration.config
+
+class RoundTrips():
+
+    def __init__(self):
+        self.count = 0
+    
+    def __call__(self, operation, command, duration, failed):
+        # Subscribed to the instruments of the database under test, every finished command is one round trip
+        self.count += 1
+
+ROUND_TRIPS = RoundTrips()
+
+def mongomock_backend():
+    # In-memory stand-in: mongomock does not emit command events, round trips are counted per collection call
+    import mongomock
+    import mongomock.collection
+    
+    client = mongomock.MongoClient()
+    depth = [0]
+    
+    def counted(method):
+        def wrapper(*args, **kwargs):
+            if depth[0] == 0:
+                ROUND_TRIPS.count += 1
+            depth[0] += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                depth[0] -= 1
+        return wrapper
+    
+    class BulkWriteResult():
+        
+        def __init__(self):
+            self.inserted_count = 0
+            self.matched_count = 0
+            self.modified_count = 0
+            self.deleted_count = 0
+            self.upserted_count = 0
+            self.upserted_ids = {}
+    
+    def bulk_write(self, requests, ordered = True, **kwargs):
+        # mongomock's bulk api predates the request objects of current pymongo, requests are replayed one by one
+        result = BulkWriteResult()
+        for i, request in enumerate(requests):
+            if isinstance(request, pymongo.InsertOne):
+                self.insert_one(request._doc)
+                result.inserted_count += 1
+            elif isinstance(request, pymongo.DeleteOne):
+                result.deleted_count += self.delete_one(request._filter).deleted_count
+            else:
+                write = self.update_one if isinstance(request, pymongo.UpdateOne) else self.replace_one
+                _result = write(request._filter, request._doc, upsert=request._upsert)
+                if _result.upserted_id is not None:
+                    result.upserted_count += 1
+                    result.upserted_ids[i] = _result.upserted_id
+                else:
+                    result.matched_count += _result.matched_count
+                    result.modified_count += _result.modified_count
+        return result
+    
+    mongomock.collection.Collection.bulk_write = bulk_write
+    for name in ["find", "find_one", "aggregate", "update_one", "replace_one", "insert_one", "insert_many",
+                 "delete_one", "delete_many", "bulk_write", "count_documents", "estimated_document_count", "drop"]:
+        setattr(mongomock.collection.Collection, name, counted(getattr(mongomock.collection.Collection, name)))
+    
+    pymongo.MongoClient = lambda *args, **kwargs: client
+
+def wide(i):
+    obj = {"value": i}
+    for j in range(100):
+        obj[f"field_{j}"] = j
+    return obj
+
+def deep(i, depth = 10):
+    obj = {"value": i}
+    for j in range(depth):
+        obj = {"level": j, "value": i, "child": obj}
+    return obj
+
+def hot_read(edb):
+    # The whole lookup, database to collection to document to field, is what the cache policy governs
+    edb.bench_hot["doc"] = {"value": 1}
+    edb.bench_hot.doc.value
+    return lambda i: edb.bench_hot.doc.value
+
+def nested_read(edb):
+    edb.bench_nested["doc"] = {"a": {"b": 1}}
+    edb["bench_nested/doc/a/b"]
+    return lambda i: edb["bench_nested/doc/a/b"]
+
+def single_write(edb):
+    edb.bench_write["doc"] = {"value": 0}
+    doc = edb.bench_write["doc"]
+    doc.value
+    def op(i):
+        doc.value = i
+    return op
+
+def batch_write(edb):
+    edb.bench_batch["doc"] = {"value": 0}
+    doc = edb.bench_batch["doc"]
+    doc.value
+    def op(i):
+        with edb().batch():
+            for j in range(1000):
+                doc[f"field_{j}"] = i
+    return op
+
+def iteration(edb):
+    collection = edb.bench_iteration
+    with edb().batch():
+        for i in range(1000):
+            collection[f"doc_{i}"] = {"value": i}
+    def op(i):
+        for key, doc in collection:
+            pass
+    return op
+
+def to_json_wide(edb):
+    edb.bench_json["wide"] = wide(0)
+    doc = edb.bench_json["wide"]
+    return lambda i: doc().to_json()
+
+def to_json_deep(edb):
+    edb.bench_json["deep"] = deep(0)
+    doc = edb.bench_json["deep"]
+    return lambda i: doc().to_json()
+
+def references(edb):
+    targets = edb.bench_targets
+    with edb().batch():
+        for i in range(100):
+            targets[f"doc_{i}"] = {"Name": f"Target {i}"}
+    edb.bench_references["doc"] = {"Name": "Source"}
+    doc = edb.bench_references["doc"]
+    with edb().batch():
+        for i in range(100):
+            doc[f"ref_{i}"] = targets[f"doc_{i}"]
+    def op(i):
+        # Reload the source and resolve every reference, targets are invalidated so each one loads
+        doc().reload()
+        for j in range(100):
+            targets[f"doc_{j}"]().invalidate()
+            doc[f"ref_{j}"].Name
+    return op
+
+CASES = {
+    "hot_read": (hot_read, 10000),
+    "nested_read": (nested_read, 10000),
+    "single_write": (single_write, 1000),
+    "batch_write": (batch_write, 20),
+    "iteration": (iteration, 20),
+    "to_json_wide": (to_json_wide, 1000),
+    "to_json_deep": (to_json_deep, 1000),
+    "references": (references, 20)
+}
+
+COLLECTIONS = ["bench_hot", "bench_nested", "bench_write", "bench_batch", "bench_iteration", "bench_json", "bench_targets", "bench_references"]
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+def run(edb, case, operations = None):
+    setup, default = CASES[case]
+    operations = operations or default
+    op = setup(edb)
+    
+    latencies = []
+    round_trips = ROUND_TRIPS.count
+    instruments = edb().instruments()
+    instruments.subscribe(ROUND_TRIPS)
+    try:
+        start = time.perf_counter()
+        for i in range(operations):
+            t = time.perf_counter_ns()
+            op(i)
+            latencies.append(time.perf_counter_ns() - t)
+        elapsed = time.perf_counter() - start
+    finally:
+        instruments.unsubscribe(ROUND_TRIPS)
+    round_trips = ROUND_TRIPS.count - round_trips
+    
+    latencies.sort()
+    return {
+        "case": case,
+        "operations": operations,
+        "ops_per_sec": round(operations / elapsed, 1),
+        "p50_us": round(percentile(latencies, 0.5) / 1000, 2),
+        "p99_us": round(percentile(latencies, 0.99) / 1000, 2),
+        "round_trips_per_op": round(round_trips / operations, 3)
+    }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Throughput, latency and round trips of endless access patterns")
+    parser.add_argument("--uri", help="mongodb uri, defaults to the configured MONGO_URI")
+    parser.add_argument("--database", default="endlessdb-benchmarks")
+    parser.add_argument("--config", default="tests/config.yml", help="defaults yml loaded into the config collection")
+    parser.add_argument("--backend", choices=["mongod", "mongomock"], default="mongod")
+    parser.add_argument("--case", choices=list(CASES), action="append")
+    parser.add_argument("--operations", type=int, help="operations per case, overrides the per case defaults")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+    
+    if args.backend == "mongomock":
+        mongomock_backend()
+    
+    BenchmarkConfiguration.config = args.config
+    BenchmarkConfiguration.apply()
+    
+    edb = EndlessDatabase(args.uri, database=args.database)
+    for key in COLLECTIONS:
+        edb[key]().delete()
+    
+    results = []
+    try:
+        for case in (args.case or CASES):
+            result = run(edb, case, args.operations)
+            results.append(result)
+            print(f"{case:>13}: {result['ops_per_sec']:>12} ops/s  p50 {result['p50_us']:>10} µs  p99 {result['p99_us']:>10} µs  {result['round_trips_per_op']:>8} round trips/op")
+    finally:
+        for key in COLLECTIONS:
+            edb[key]().delete()
+    
+    report = {
+        "created": datetime.now().isoformat(),
+        "backend": args.backend,
+        "database": args.database,
+        "python": platform.python_version(),
+        "pymongo": pymongo.version,
+        "results": results
+    }
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=4)
+    
+    return report
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
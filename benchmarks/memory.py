@@ -0,0 +1,70 @@
+import sys
+import json
+import argparse
+import tracemalloc
+
+from src.endlessdb import EndlessCollection
+
+def flat(i):
+    return {
+        "_id": i, 
+        "name": f"name_{i}", 
+        "value": i, 
+        "enabled": True
+    }
+
+def wide(i):
+    obj = {"_id": i}
+    for j in range(100):
+        obj[f"field_{j}"] = j
+    return obj
+
+def deep(i, depth = 10):
+    obj = {"_id": i, "value": i}
+    for j in range(depth):
+        obj = {"level": j, "value": i, "child": obj}
+    return obj
+
+SHAPES = {
+    "flat": flat,
+    "wide": wide,
+    "deep": deep
+}
+
+def measure(shape, count = 1000):
+    # Raw documents are built before tracing, only the endless object graph is measured
+    yml = {f"doc_{i}": SHAPES[shape](i) for i in range(count)}
+    
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    collection = EndlessCollection(shape, None, yml)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "shape": shape,
+        "documents": count,
+        "bytes": current - start,
+        "peak": peak - start,
+        "bytes_per_document": (current - start) // count
+    }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Memory footprint of endless documents")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--shape", choices=list(SHAPES), action="append")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+    
+    results = [measure(shape, args.count) for shape in (args.shape or SHAPES)]
+    for result in results:
+        print(f"{result['shape']:>6}: {result['bytes_per_document']:>8} bytes/document ({result['documents']} documents, peak {result['peak']} bytes)")
+    
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+    
+    return results
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
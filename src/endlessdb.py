@@ -1,16 +1,29 @@
+import io
 import os
+import asyncio
 import re
+import gzip
+import shutil
+import sys
+import time
 import uuid
 import bson
 import yaml
 import uuid
 import json
 import base64
+import bisect
 import pymongo
+import hashlib
 import inspect
 import logging
+import weakref
+import threading
 import pymongo.collection
 import pymongo.database
+import pymongo.monitoring
+import contextvars
+import contextlib
 
 from abc import abstractmethod
 from typing import Any
@@ -22,8 +35,16 @@ from datetime import (
     date,
     datetime
 )
+from bson import json_util
 from bson.objectid import ObjectId
 from functools import partial
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import MappingProxyType
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor
+)
 
 class Formatter(logging.Formatter):
 
@@ -102,6 +123,8 @@ class Logger:
 
 class EndlessConfiguration():
     _override = {}
+    _resolved = {}
+    _members = {}
     
     def __init__(self) -> None:
         if type(self) == EndlessConfiguration:
@@ -114,7 +137,40 @@ class EndlessConfiguration():
             self.MONGO_DATABASE = "endlessdb"
             
             self.CONFIG_COLLECTION = "config"
-            self.CONFIG_YML: str = "~/config.yml"            
+            self.CONFIG_YML: str = "~/config.yml"
+            
+            self.CACHE_POLICY = "always"
+            self.CACHE_TTL = 0
+            
+            self.CURSOR_BATCH_SIZE = 1000
+            
+            self.CACHE_MAX_DOCUMENTS = 100000
+            self.CACHE_MAX_BYTES = 0
+            self.CACHE_MAX_VIRTUAL = 10000
+            self.CACHE_EVICTION = "lru"
+            
+            self.THREAD_SAFE = False
+            self.THREAD_SAFE_STRIPES = 16
+            
+            self.MONGO_MAX_POOL_SIZE = 100
+            self.MONGO_MIN_POOL_SIZE = 0
+            self.MONGO_MAX_IDLE_TIME_MS = None
+            self.MONGO_WAIT_QUEUE_TIMEOUT_MS = None
+            self.MONGO_COMPRESSORS = None
+            
+            self.READ_PREFERENCE = None
+            self.READ_CONCERN = None
+            self.COLLECTION_READ_PREFERENCE = {}
+            self.COLLECTION_READ_CONCERN = {}
+            
+            self.COUNT_STRATEGY = "exact"
+            self.COUNT_TTL = 60
+            
+            self.EXPORT_WORKERS = 4
+            self.EXPORT_SPLIT_DOCUMENTS = 1000000
+            
+            self.INSTRUMENTATION = True
+            self.PROFILE_THRESHOLD = 3
         else:
             self.override()
     
@@ -129,25 +185,42 @@ class EndlessConfiguration():
         if issubclass(cls, EndlessConfiguration):
             if len(cls.__bases__) > 0 and issubclass(cls.__bases__[0], EndlessConfiguration):
                 EndlessConfiguration._override[str(cls.__bases__[0])] = cls()
+                EndlessConfiguration._resolved.clear()
+                for c in [cls.__bases__[0], cls]:
+                    EndlessConfiguration.resolve(c)
+    
+    @staticmethod
+    def resolve(c):
+        # Override chains are flattened once per class, reads are a dict lookup
+        resolved = EndlessConfiguration._resolved.get(c)
+        if resolved is None:
+            values = {}
+            cs = str(c)
+            if cs in EndlessConfiguration._override:
+                _ov = EndlessConfiguration._override[cs]
+                values = {key: value for key, value in _ov.__dict__.items() if value is not None}
+                values.update(EndlessConfiguration.resolve(type(_ov)))
+            resolved = MappingProxyType(values)
+            EndlessConfiguration._resolved[c] = resolved
+        return resolved
     
     @abstractmethod
     def override(self):
         pass
     
     def __getattr__(self, key: str) -> Any:
-        c = type(self)
-        cs = str(c)
-        _ov = None
-        if cs in EndlessConfiguration._override:
-            _ov = EndlessConfiguration._override[cs].__getattr__(key)
-            
+        _ov = EndlessConfiguration.resolve(type(self)).get(key)
         if _ov is not None:
             return  _ov
         
-        if key in self.__dict__:
-            return self.__dict__[key]
-        
-        return None 
+        return self.__dict__.get(key)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        for _ov in EndlessConfiguration._override.values():
+            if _ov is self:
+                EndlessConfiguration._resolved.clear()
+                break
         
     def __getitem__(self, key: str) -> Any:
         return self.__getattr__(key)
@@ -160,7 +233,11 @@ class EndlessConfiguration():
         if name == "__dict__":
             return _dict
         
-        _dir = dir(self)        
+        c = type(self)
+        _dir = EndlessConfiguration._members.get(c)
+        if _dir is None:
+            _dir = frozenset(dir(c))
+            EndlessConfiguration._members[c] = _dir
         if name in _dict \
             or name not in _dir:
             return self.__getattr__(name)
@@ -182,12 +259,717 @@ def json_default_encoder(obj):
     
     if isinstance(obj, (date, datetime)):
         return obj.isoformat()
+    
+    if isinstance(obj, EndlessReference):
+        return str(obj._ref)
         
     if hasattr(obj, "__dict__"):
         return obj.__dict__
     else:
         return obj.__str__()
 
+CACHE_POLICIES = ["always", "ttl", "never"]
+CACHE_EVICTIONS = ["lru", "lfu"]
+COUNT_STRATEGIES = ["exact", "estimated", "ttl", "offline"]
+READ_PREFERENCES = {
+    "primary": pymongo.ReadPreference.PRIMARY,
+    "primaryPreferred": pymongo.ReadPreference.PRIMARY_PREFERRED,
+    "secondary": pymongo.ReadPreference.SECONDARY,
+    "secondaryPreferred": pymongo.ReadPreference.SECONDARY_PREFERRED,
+    "nearest": pymongo.ReadPreference.NEAREST
+}
+
+# One client, and so one connection pool and set of monitor threads, per uri and pool settings
+_clients = {}
+_clients_lock = threading.Lock()
+
+def bson_fallback_encoder(value):
+    # References bound inside lists and embedded documents are written back as the DBRef they came from
+    if isinstance(value, EndlessReference):
+        return value._ref
+    return value
+
+ENCODERS = bson.codec_options.TypeRegistry(fallback_encoder=bson_fallback_encoder)
+
+def mongo_client(url, **options):
+    key = (url, tuple(sorted((name, str(value)) for name, value in options.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = pymongo.MongoClient(url, connect=False, type_registry=ENCODERS, **options)
+            _clients[key] = client
+    return client
+
+EXPORT_FORMATS = ["jsonl", "yml"]
+
+def export_name(key, format, **kwargs):
+    name = f"{key}.{format}"
+    if kwargs.get("gzip"):
+        name += ".gz"
+    if kwargs.get("base64"):
+        name += ".b64"
+    return name
+
+def export_plain(value):
+    if isinstance(value, dict):
+        return {key: export_plain(_value) for key, _value in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [export_plain(_value) for _value in value]
+    if isinstance(value, EndlessReference):
+        return value._ref
+    return value
+
+# BSON types without a YAML counterpart are written as tagged scalars, so a re-import keeps their type
+class ExportDumper(yaml.SafeDumper):
+    pass
+
+class ImportLoader(yaml.SafeLoader):
+    pass
+
+def represent_tagged(tag, dumper, value):
+    return dumper.represent_scalar(tag, str(value))
+
+def construct_tagged(cls, loader, node):
+    return cls(loader.construct_scalar(node))
+
+def represent_binary(dumper, value):
+    # Binary subtypes (uuids stored without a uuid representation among them) as subtype:base64
+    return dumper.represent_scalar("!binary", f"{value.subtype}:{base64.b64encode(value).decode('ascii')}")
+
+def construct_binary(loader, node):
+    subtype, data = loader.construct_scalar(node).split(":", 1)
+    return bson.binary.Binary(base64.b64decode(data), int(subtype))
+
+def represent_timestamp(dumper, value):
+    return dumper.represent_scalar("!timestamp", f"{value.time}:{value.inc}")
+
+def construct_timestamp(loader, node):
+    time, inc = loader.construct_scalar(node).split(":")
+    return bson.timestamp.Timestamp(int(time), int(inc))
+
+def represent_regex(dumper, value):
+    if isinstance(value, re.Pattern):
+        value = bson.regex.Regex.from_native(value)
+    return dumper.represent_mapping("!regex", {"pattern": value.pattern, "flags": int(value.flags)})
+
+def construct_regex(loader, node):
+    value = loader.construct_mapping(node)
+    return bson.regex.Regex(value["pattern"], value["flags"])
+
+def represent_code(dumper, value):
+    if value.scope is None:
+        return dumper.represent_scalar("!code", str(value))
+    return dumper.represent_mapping("!code", {"code": str(value), "scope": value.scope})
+
+def construct_code(loader, node):
+    if isinstance(node, yaml.MappingNode):
+        value = loader.construct_mapping(node, deep=True)
+        return bson.code.Code(value["code"], value["scope"])
+    return bson.code.Code(loader.construct_scalar(node))
+
+def represent_dbref(dumper, value):
+    ref = {"$ref": value.collection, "$id": value.id}
+    if value.database is not None:
+        ref["$db"] = value.database
+    return dumper.represent_mapping("!dbref", ref)
+
+def construct_dbref(loader, node):
+    value = loader.construct_mapping(node, deep=True)
+    return bson.dbref.DBRef(value["$ref"], value["$id"], value.get("$db"))
+
+ExportDumper.add_representer(ObjectId, partial(represent_tagged, "!objectid"))
+ExportDumper.add_representer(uuid.UUID, partial(represent_tagged, "!uuid"))
+ExportDumper.add_representer(bson.decimal128.Decimal128, partial(represent_tagged, "!decimal128"))
+ExportDumper.add_representer(bson.binary.Binary, represent_binary)
+ExportDumper.add_representer(bson.timestamp.Timestamp, represent_timestamp)
+ExportDumper.add_representer(bson.regex.Regex, represent_regex)
+ExportDumper.add_representer(re.Pattern, represent_regex)
+ExportDumper.add_representer(bson.code.Code, represent_code)
+ExportDumper.add_representer(bson.dbref.DBRef, represent_dbref)
+ExportDumper.add_representer(bson.min_key.MinKey, lambda dumper, value: dumper.represent_scalar("!minkey", ""))
+ExportDumper.add_representer(bson.max_key.MaxKey, lambda dumper, value: dumper.represent_scalar("!maxkey", ""))
+ExportDumper.add_representer(bson.int64.Int64, lambda dumper, value: dumper.represent_int(int(value)))
+ImportLoader.add_constructor("!objectid", partial(construct_tagged, ObjectId))
+ImportLoader.add_constructor("!uuid", partial(construct_tagged, uuid.UUID))
+ImportLoader.add_constructor("!decimal128", partial(construct_tagged, bson.decimal128.Decimal128))
+ImportLoader.add_constructor("!binary", construct_binary)
+ImportLoader.add_constructor("!timestamp", construct_timestamp)
+ImportLoader.add_constructor("!regex", construct_regex)
+ImportLoader.add_constructor("!code", construct_code)
+ImportLoader.add_constructor("!dbref", construct_dbref)
+ImportLoader.add_constructor("!minkey", lambda loader, node: bson.min_key.MinKey())
+ImportLoader.add_constructor("!maxkey", lambda loader, node: bson.max_key.MaxKey())
+
+def export_record(obj, format):
+    if format == "jsonl":
+        # Extended JSON keeps ObjectId, dates and references importable as they were
+        return (json_util.dumps(obj, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n").encode("utf-8")
+    if format == "yml":
+        return yaml.dump(export_plain(obj), Dumper=ExportDumper, explicit_start=True, default_flow_style=False, allow_unicode=True, sort_keys=False).encode("utf-8")
+    
+    raise Exception(f"Export format must be one of {EXPORT_FORMATS}")
+
+class StreamWriter():
+    
+    def __init__(self, target):
+        if isinstance(target, (str, Path)):
+            self._file = open(target, "wb")
+            self._owned = True
+        else:
+            self._file = target
+            self._owned = False
+        self._text = isinstance(self._file, io.TextIOBase)
+        self._sha256 = hashlib.sha256()
+        self.bytes = 0
+    
+    def write(self, data):
+        self._sha256.update(data)
+        self.bytes += len(data)
+        if self._text:
+            self._file.write(data.decode("utf-8"))
+        else:
+            self._file.write(data)
+        return len(data)
+    
+    def flush(self):
+        self._file.flush()
+    
+    def close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+    
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+class Base64Writer():
+    
+    def __init__(self, raw):
+        self._raw = raw
+        self._remainder = b""
+    
+    def write(self, data):
+        # Whole 57 byte groups encode to complete 76 character lines, the rest waits for more data
+        buffer = self._remainder + data
+        size = len(buffer) - len(buffer) % 57
+        if size > 0:
+            self._raw.write(base64.encodebytes(buffer[:size]))
+        self._remainder = buffer[size:]
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        if len(self._remainder) > 0:
+            self._raw.write(base64.encodebytes(self._remainder))
+            self._remainder = b""
+
+@contextmanager
+def export_stream(target, **kwargs):
+    # Records go through gzip then base64 on their way to the target, nothing is held beyond a buffer
+    stream = StreamWriter(target)
+    layers = []
+    writer = stream
+    if kwargs.get("base64"):
+        writer = Base64Writer(writer)
+        layers.append(writer)
+    if kwargs.get("gzip"):
+        writer = gzip.GzipFile(fileobj=writer, mode="wb")
+        layers.append(writer)
+    try:
+        yield writer, stream
+    finally:
+        for layer in reversed(layers):
+            layer.close()
+        stream.close()
+
+def id_bracket(value):
+    # MongoDB sorts _id values by type bracket first, numbers share one bracket
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float, bson.int64.Int64, bson.decimal128.Decimal128)):
+        return "number"
+    return type(value).__name__
+
+# _id type brackets in MongoDB's sort order, with their $type aliases
+ID_BRACKETS = [
+    (bson.min_key.MinKey, ["minKey"]),
+    (type(None), ["null"]),
+    ((int, float, bson.int64.Int64, bson.decimal128.Decimal128), ["double", "int", "long", "decimal"]),
+    (str, ["string", "symbol"]),
+    (dict, ["object"]),
+    ((bytes, uuid.UUID), ["binData"]),
+    (ObjectId, ["objectId"]),
+    (bool, ["bool"]),
+    (datetime, ["date"]),
+    (bson.timestamp.Timestamp, ["timestamp"]),
+    (bson.max_key.MaxKey, ["maxKey"])
+]
+
+def id_rank(value):
+    if isinstance(value, bool):
+        return [types for types, _ in ID_BRACKETS].index(bool)
+    for rank, (types, _) in enumerate(ID_BRACKETS):
+        if isinstance(value, types):
+            return rank
+    return len(ID_BRACKETS)
+
+def id_after(value, after):
+    rank, _rank = id_rank(value), id_rank(after)
+    if rank != _rank:
+        return rank > _rank
+    try:
+        return value > after
+    except TypeError:
+        return False
+
+def id_filters(after):
+    # Range filters only match their own type bracket, the brackets sorting after continue the page
+    if after is None:
+        return [{}]
+    aliases = [alias for _, _aliases in ID_BRACKETS[id_rank(after) + 1:] for alias in _aliases]
+    if not aliases:
+        return [{"_id": {"$gt": after}}]
+    return [{"_id": {"$gt": after}}, {"_id": {"$type": aliases}}]
+
+BASE64_CHUNK_SIZE = 64 * 1024
+
+class Base64Reader(io.RawIOBase):
+    
+    def __init__(self, raw):
+        self._raw = raw
+        self._buffer = b""
+        self._encoded = b""
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, b):
+        # Fixed size chunks whatever the line width, only whole groups of 4 characters are decoded
+        while len(self._buffer) < len(b):
+            chunk = self._raw.read(BASE64_CHUNK_SIZE)
+            if not chunk:
+                if len(self._encoded) > 0:
+                    self._buffer += base64.b64decode(self._encoded)
+                    self._encoded = b""
+                break
+            self._encoded += b"".join(chunk.split())
+            size = len(self._encoded) - len(self._encoded) % 4
+            self._buffer += base64.b64decode(self._encoded[:size])
+            self._encoded = self._encoded[size:]
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+def import_format(name):
+    suffixes = [suffix.lower() for suffix in Path(name).suffixes]
+    for suffix in suffixes:
+        if suffix in [".jsonl", ".json", ".ndjson"]:
+            return "jsonl"
+        if suffix in [".yml", ".yaml"]:
+            return "yml"
+    return None
+
+@contextmanager
+def import_stream(source, **kwargs):
+    # The reverse of export_stream: base64 then gzip are undone while reading, yields a text stream
+    if isinstance(source, (str, Path)):
+        suffixes = [suffix.lower() for suffix in Path(source).suffixes]
+        decode = kwargs.get("base64", ".b64" in suffixes)
+        decompress = kwargs.get("gzip", ".gz" in suffixes)
+        file = open(source, "rb")
+    else:
+        decode = kwargs.get("base64", False)
+        decompress = kwargs.get("gzip", False)
+        file = source
+    
+    try:
+        if isinstance(file, io.TextIOBase):
+            if decode or decompress:
+                raise Exception("base64 and gzip sources must be opened in binary mode")
+            yield file
+            return
+        
+        stream = file
+        if decode:
+            stream = io.BufferedReader(Base64Reader(stream))
+        if decompress:
+            stream = gzip.GzipFile(fileobj=stream, mode="rb")
+        text = io.TextIOWrapper(stream, encoding="utf-8")
+        try:
+            yield text
+        finally:
+            text.detach()
+    finally:
+        if file is not source:
+            file.close()
+
+def import_records(text, format):
+    if format == "jsonl":
+        for line in text:
+            if line.strip():
+                yield json_util.loads(line)
+    elif format == "yml":
+        for document in yaml.load_all(text, Loader=ImportLoader):
+            if document is None:
+                continue
+            if not isinstance(document, dict):
+                raise Exception(f"YAML import expects documents or a mapping of keys to documents, got {type(document).__name__}")
+            if "_id" in document:
+                yield document
+            else:
+                # A whole collection as one mapping of keys to documents, as in config.yml
+                for key, value in document.items():
+                    if not isinstance(value, dict):
+                        raise Exception(f"YAML import expects a document for key {key}, got {type(value).__name__}")
+                    yield {"_id": key, **value}
+    else:
+        raise Exception(f"Import format must be one of {EXPORT_FORMATS}")
+
+class PathTree(dict):
+    pass
+
+def merge_path(tree, path, value):
+    keys = path.split(".")
+    node = tree
+    for i in range(len(keys) - 1):
+        child = node.get(keys[i])
+        if isinstance(child, dict) and not isinstance(child, PathTree):
+            # Patch a copy of the value that was set as a whole
+            child = node[keys[i]] = dict(child)
+            for key in keys[i + 1:-1]:
+                if isinstance(child.get(key), dict):
+                    child[key] = dict(child[key])
+                else:
+                    child[key] = {}
+                child = child[key]
+            child[keys[-1]] = value
+            return
+        
+        if not isinstance(child, PathTree):
+            child = node[keys[i]] = PathTree()
+        node = child
+        
+    node[keys[-1]] = value
+
+def find_path(tree, path):
+    node = tree
+    for key in path.split("."):
+        if not isinstance(node, dict) or key not in node:
+            return None
+        node = node[key]
+    return None if isinstance(node, PathTree) else node
+
+def combine_update(operator, previous, value):
+    # The same operator staged twice on one path folds into a single update
+    if operator == "$inc":
+        return previous + value
+    if operator in ["$push", "$addToSet"]:
+        return {"$each": previous["$each"] + value["$each"]}
+    if operator == "$min":
+        return min(previous, value)
+    if operator == "$max":
+        return max(previous, value)
+    return value
+
+def flatten_path(tree, prefix = ""):
+    for key, value in tree.items():
+        if isinstance(value, PathTree):
+            yield from flatten_path(value, f"{prefix}{key}.")
+        else:
+            yield (f"{prefix}{key}", value)
+
+def covers_path(fields, path):
+    if fields is None:
+        return True
+    
+    for field in fields:
+        if path == field or path.startswith(f"{field}."):
+            return True
+    
+    return False
+
+FLAG_STATIC = 1
+FLAG_DEBUG = 2
+FLAG_VIRTUAL = 4
+FLAG_PROTECTED = 8
+FLAG_DESCENDANT_CREATE = 16
+FLAG_DESCENDANT_REWRITE = 32
+FLAG_DESCENDANT_EXCEPTION = 64
+
+def flag(mask):
+    def get(self):
+        return self._flags & mask != 0
+    
+    def set(self, value):
+        if value:
+            self._flags |= mask
+        else:
+            self._flags &= ~mask
+    
+    return property(get, set)
+
+# Library operation running in this thread or task, the commands it sends are attributed to it
+_operation = contextvars.ContextVar("endlessdb_operation", default=None)
+
+HISTOGRAM_BUCKETS = [100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000]
+
+class Operation():
+    
+    __slots__ = ["_instruments", "_name", "_token"]
+    
+    def __init__(self, instruments, name):
+        self._instruments = instruments
+        self._name = name
+        self._token = None
+    
+    def __enter__(self):
+        # The outermost operation owns the commands, a reload inside a set is part of the set
+        if _operation.get() is None:
+            self._token = _operation.set((self._instruments, self._name))
+        return self
+    
+    def __exit__(self, *args):
+        if self._token is not None:
+            _operation.reset(self._token)
+            self._token = None
+        return False
+
+_exhausted = object()
+
+def attributed(operation, iterable):
+    # Each fetch runs inside the operation, the caller's loop body runs outside it
+    iterator = iter(iterable)
+    while True:
+        with operation:
+            obj = next(iterator, _exhausted)
+        if obj is _exhausted:
+            return
+        yield obj
+
+class Instruments():
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._callbacks = []
+    
+    def record(self, operation, command, duration, failed):
+        bucket = bisect.bisect_left(HISTOGRAM_BUCKETS, duration)
+        with self._lock:
+            stats = self._stats.get((operation, command))
+            if stats is None:
+                # count, failed, total and max microseconds, histogram
+                stats = [0, 0, 0, 0, [0] * (len(HISTOGRAM_BUCKETS) + 1)]
+                self._stats[(operation, command)] = stats
+            stats[0] += 1
+            if failed:
+                stats[1] += 1
+            stats[2] += duration
+            if duration > stats[3]:
+                stats[3] = duration
+            stats[4][bucket] += 1
+        
+        for callback in self._callbacks:
+            callback(operation, command, duration, failed)
+    
+    def stats(self):
+        result = {}
+        labels = [str(bound) for bound in HISTOGRAM_BUCKETS] + ["+Inf"]
+        with self._lock:
+            for (operation, command), stats in self._stats.items():
+                result.setdefault(operation, {})[command] = {
+                    "count": stats[0],
+                    "failed": stats[1],
+                    "total_us": stats[2],
+                    "max_us": stats[3],
+                    "histogram": dict(zip(labels, stats[4]))
+                }
+        return result
+    
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+    
+    def subscribe(self, callback):
+        self._callbacks = self._callbacks + [callback]
+        return callback
+    
+    def unsubscribe(self, callback):
+        self._callbacks = [_callback for _callback in self._callbacks if _callback is not callback]
+
+_profile = contextvars.ContextVar("endlessdb_profile", default=None)
+
+_library_files = {__file__, contextlib.__file__}
+_driver_paths = (os.path.dirname(pymongo.__file__), os.path.dirname(bson.__file__))
+
+def caller():
+    # The query location is the frame that called into endlessdb last on the way up, whatever driver frames sit below
+    location = None
+    outside = None
+    inside = False
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_filename in _library_files:
+            inside = True
+        else:
+            if inside:
+                location = frame
+                inside = False
+            if outside is None and not frame.f_code.co_filename.startswith(_driver_paths):
+                outside = frame
+        frame = frame.f_back
+    
+    frame = location or outside
+    if frame is None:
+        return None
+    return f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+class Profile():
+    
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.queries = []
+        self._pending = {}
+    
+    def started(self, event):
+        command = event.command
+        collection = command.get(event.command_name)
+        _filter = command.get("filter")
+        _id = None
+        if isinstance(_filter, dict) and "_id" in _filter and not isinstance(_filter["_id"], dict):
+            _id = _filter["_id"]
+        
+        scope = _operation.get()
+        query = {
+            "command": event.command_name,
+            "collection": collection if isinstance(collection, str) else None,
+            "id": _id,
+            "operation": None if scope is None else scope[1],
+            "location": caller(),
+            "duration_us": None
+        }
+        self.queries.append(query)
+        self._pending[(event.connection_id, event.request_id)] = query
+    
+    def finished(self, event):
+        query = self._pending.pop((event.connection_id, event.request_id), None)
+        if query is not None:
+            query["duration_us"] = event.duration_micros
+    
+    def findings(self):
+        repeated = {}
+        per_key = {}
+        cascades = {}
+        for query in self.queries:
+            if query["command"] != "find" or query["id"] is None:
+                continue
+            
+            key = (query["collection"], query["id"])
+            repeated.setdefault(key, []).append(query)
+            
+            key = (query["collection"], query["location"])
+            if query["operation"] == "dereference":
+                cascades.setdefault(key, []).append(query)
+            else:
+                per_key.setdefault(key, []).append(query)
+        
+        findings = []
+        for (collection, _id), queries in repeated.items():
+            if len(queries) > 1:
+                findings.append(self.finding("repeated", collection, queries, f"_id {_id!r} fetched {len(queries)} times"))
+        
+        for (collection, location), queries in per_key.items():
+            ids = len(set(str(query["id"]) for query in queries))
+            if ids >= self.threshold:
+                findings.append(self.finding("n+1", collection, queries, f"{ids} documents fetched one by one, use find() or iterate the collection"))
+        
+        for (collection, location), queries in cascades.items():
+            if len(queries) >= self.threshold:
+                findings.append(self.finding("dbref", collection, queries, f"{len(queries)} references resolved one by one, use prefetch"))
+        
+        findings.sort(key=lambda finding: (finding["queries"], finding["duration_us"]), reverse=True)
+        return findings
+    
+    def finding(self, pattern, collection, queries, message):
+        locations = {}
+        for query in queries:
+            locations[query["location"]] = locations.get(query["location"], 0) + 1
+        return {
+            "pattern": pattern,
+            "collection": collection,
+            "queries": len(queries),
+            "duration_us": sum(query["duration_us"] or 0 for query in queries),
+            "locations": sorted(locations, key=locations.get, reverse=True),
+            "message": message
+        }
+    
+    def hot_paths(self, limit = 5):
+        locations = {}
+        for query in self.queries:
+            stats = locations.setdefault(query["location"], [0, 0])
+            stats[0] += 1
+            stats[1] += query["duration_us"] or 0
+        ranked = sorted(locations.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)
+        return [{"location": location, "queries": stats[0], "duration_us": stats[1]} for location, stats in ranked[:limit]]
+    
+    def report(self):
+        findings = self.findings()
+        lines = [f"🔎profile: {len(self.queries)} queries, {len(findings)} findings"]
+        for i, finding in enumerate(findings):
+            lines.append(f"{i + 1:>3}. [{finding['pattern']}] {finding['collection']}: {finding['message']} ({finding['queries']} queries, {finding['duration_us']}µs)")
+            for location in finding["locations"][:3]:
+                lines.append(f"       at {location}")
+        
+        hot_paths = self.hot_paths()
+        if len(hot_paths) > 0:
+            lines.append("     hot paths:")
+            for hot_path in hot_paths:
+                lines.append(f"       {hot_path['queries']:>6} queries {hot_path['duration_us']:>10}µs at {hot_path['location']}")
+        return "\n".join(lines)
+
+class CommandInstrumentation(pymongo.monitoring.CommandListener):
+    
+    def started(self, event):
+        profile = _profile.get()
+        if profile is not None:
+            profile.started(event)
+    
+    def succeeded(self, event):
+        scope = _operation.get()
+        if scope is not None:
+            scope[0].record(scope[1], event.command_name, event.duration_micros, False)
+        profile = _profile.get()
+        if profile is not None:
+            profile.finished(event)
+    
+    def failed(self, event):
+        scope = _operation.get()
+        if scope is not None:
+            scope[0].record(scope[1], event.command_name, event.duration_micros, True)
+        profile = _profile.get()
+        if profile is not None:
+            profile.finished(event)
+
+# One listener for every client, it only looks up the operation of the calling context
+COMMANDS = CommandInstrumentation()
+
+def cached_count(container, strategy, ttl, offline, count):
+    # Cached counts live on the container as _count/_counted, writes adjust _count in place
+    if container._count is not None \
+        and (strategy == "offline" or time.monotonic() - container._counted < ttl):
+        return container._count
+    
+    if offline and strategy == "offline":
+        return None
+    
+    container._count = count()
+    container._counted = time.monotonic()
+    return container._count
+
 def is_magic_method(method):
     if isinstance(method, int):
         return False
@@ -206,36 +988,378 @@ class w():
     def __setattr__(self, key: str, value: Any) -> None:
         self.d[key] = value
 
+def sizeof(value, depth = 8):
+    size = sys.getsizeof(value)
+    if depth == 0:
+        return size
+    
+    if isinstance(value, EndlessDocument):
+        for key, _value in value.__dict__.items():
+            if key != "***":
+                size += sizeof(_value, depth - 1)
+    elif isinstance(value, dict):
+        for key, _value in value.items():
+            size += sys.getsizeof(key) + sizeof(_value, depth - 1)
+    elif isinstance(value, (list, tuple)):
+        for _value in value:
+            size += sizeof(_value, depth - 1)
+    
+    return size
+
+class IdentityMap():
+    
+    #region 📌Magic
+    
+    def __init__(self, max_documents = 0, max_bytes = 0, max_virtual = 0, eviction = "lru"):
+        if eviction not in CACHE_EVICTIONS:
+            raise Exception(f"Cache eviction must be one of {CACHE_EVICTIONS}")
+        
+        self.max_documents = max_documents or 0
+        self.max_bytes = max_bytes or 0
+        self.max_virtual = max_virtual or 0
+        self.eviction = eviction
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._documents = OrderedDict()
+        self._virtual = OrderedDict()
+        self._live = weakref.WeakValueDictionary()
+        self._sizes = {}
+        self._bytes = 0
+        self._counts = {}
+        self._frequencies = {}
+        self._frequency = 1
+    
+    def __repr__(self) -> str:
+        return f"🗂️documents({self.stats()})"
+    
+    def __len__(self):
+        return len(self._documents) + len(self._virtual)
+    
+    def __iter__(self):
+        return iter(list(self._documents) + list(self._virtual))
+    
+    def __contains__(self, path):
+        if path in self._documents:
+            self.hits += 1
+            self._touch(path)
+            return True
+        
+        if path in self._virtual:
+            self.hits += 1
+            document = self._virtual[path]
+            if document.__dict__["***"].virtual:
+                self._virtual.move_to_end(path)
+            else:
+                del self._virtual[path]
+                self._add(path, document)
+            return True
+        
+        # Evicted, but still held somewhere: keep that instance canonical
+        document = self._live.get(path)
+        if document is not None:
+            self.hits += 1
+            self._set(path, document)
+            return True
+        
+        self.misses += 1
+        return False
+    
+    def __getitem__(self, path):
+        if path in self._documents:
+            return self._documents[path]
+        
+        if path in self._virtual:
+            return self._virtual[path]
+        
+        return self._live[path]
+    
+    def __setitem__(self, path, document):
+        if path in self._documents or path in self._virtual:
+            self._remove(path)
+        
+        self._live[path] = document
+        self._set(path, document)
+    
+    def __delitem__(self, path):
+        if path not in self._documents and path not in self._virtual and path not in self._live:
+            raise KeyError(path)
+        
+        self._remove(path)
+        self._live.pop(path, None)
+    
+    #endregion 📌Magic
+    
+    #region 📌Methods
+    
+    def _set(self, path, document):
+        if document.__dict__["***"].virtual:
+            self._virtual[path] = document
+            while self.max_virtual > 0 and len(self._virtual) > self.max_virtual:
+                self._virtual.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._add(path, document)
+    
+    def get(self, path, default = None):
+        if path in self:
+            return self[path]
+        
+        return default
+    
+    def setdefault(self, path, document):
+        if path in self:
+            return self[path]
+        
+        self[path] = document
+        return document
+    
+    def items(self):
+        # Evicted documents still held elsewhere are included, recency and hits are left alone
+        items = dict(self._live.items())
+        items.update(self._documents)
+        items.update(self._virtual)
+        return list(items.items())
+    
+    def pop(self, path, default = None):
+        if path in self._documents or path in self._virtual:
+            document = self[path]
+            self._remove(path)
+            self._live.pop(path, None)
+            return document
+        
+        return self._live.pop(path, default)
+    
+    def clear(self):
+        self._documents.clear()
+        self._virtual.clear()
+        self._live.clear()
+        self._sizes.clear()
+        self._counts.clear()
+        self._frequencies.clear()
+        self._bytes = 0
+    
+    def stats(self):
+        return {
+            "documents": len(self._documents),
+            "virtual": len(self._virtual),
+            "live": len(self._live),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "max_documents": self.max_documents,
+            "max_bytes": self.max_bytes,
+            "max_virtual": self.max_virtual,
+            "eviction": self.eviction
+        }
+    
+    def _add(self, path, document):
+        if self.max_bytes > 0:
+            size = sizeof(document)
+        else:
+            size = 0
+        
+        while len(self._documents) > 0 \
+            and ((self.max_documents > 0 and len(self._documents) >= self.max_documents) \
+                or (self.max_bytes > 0 and self._bytes + size > self.max_bytes)):
+            self._remove(self._victim())
+            self.evictions += 1
+        
+        self._documents[path] = document
+        if self.max_bytes > 0:
+            self._sizes[path] = size
+            self._bytes += size
+        
+        if self.eviction == "lfu":
+            self._counts[path] = 1
+            if 1 not in self._frequencies:
+                self._frequencies[1] = OrderedDict()
+            self._frequencies[1][path] = None
+            self._frequency = 1
+    
+    def _remove(self, path):
+        if path in self._virtual:
+            del self._virtual[path]
+            return
+        
+        if path not in self._documents:
+            return
+        
+        del self._documents[path]
+        if path in self._sizes:
+            self._bytes -= self._sizes.pop(path)
+        
+        if path in self._counts:
+            count = self._counts.pop(path)
+            frequency = self._frequencies[count]
+            del frequency[path]
+            if len(frequency) == 0:
+                del self._frequencies[count]
+    
+    def _touch(self, path):
+        if self.eviction == "lfu":
+            count = self._counts[path]
+            frequency = self._frequencies[count]
+            del frequency[path]
+            if len(frequency) == 0:
+                del self._frequencies[count]
+            
+            self._counts[path] = count + 1
+            if count + 1 not in self._frequencies:
+                self._frequencies[count + 1] = OrderedDict()
+            self._frequencies[count + 1][path] = None
+        else:
+            self._documents.move_to_end(path)
+    
+    def _victim(self):
+        if self.eviction == "lfu":
+            if self._frequency not in self._frequencies:
+                self._frequency = min(self._frequencies)
+            return next(iter(self._frequencies[self._frequency]))
+        
+        return next(iter(self._documents))
+    
+    #endregion 📌Methods
+
+class StripedIdentityMap():
+    
+    #region 📌Magic
+    
+    def __init__(self, max_documents = 0, max_bytes = 0, max_virtual = 0, eviction = "lru", stripes = 16):
+        # Paths hash onto independently locked stripes, threads working on different documents rarely contend
+        stripes = max(int(stripes or 1), 1)
+        self._stripes = [
+            IdentityMap(
+                -(-(max_documents or 0) // stripes), 
+                -(-(max_bytes or 0) // stripes), 
+                -(-(max_virtual or 0) // stripes), 
+                eviction
+            ) for _ in range(stripes)
+        ]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+    
+    def __repr__(self) -> str:
+        return f"🗂️documents({self.stats()})"
+    
+    def __len__(self):
+        return sum(len(stripe) for stripe in self._stripes)
+    
+    def __iter__(self):
+        paths = []
+        for lock, stripe in zip(self._locks, self._stripes):
+            with lock:
+                paths += list(stripe)
+        return iter(paths)
+    
+    def __contains__(self, path):
+        lock, stripe = self._stripe(path)
+        with lock:
+            return path in stripe
+    
+    def __getitem__(self, path):
+        lock, stripe = self._stripe(path)
+        with lock:
+            return stripe[path]
+    
+    def __setitem__(self, path, document):
+        lock, stripe = self._stripe(path)
+        with lock:
+            stripe[path] = document
+    
+    def __delitem__(self, path):
+        lock, stripe = self._stripe(path)
+        with lock:
+            del stripe[path]
+    
+    #endregion 📌Magic
+    
+    #region 📌Methods
+    
+    def _stripe(self, path):
+        i = hash(path) % len(self._stripes)
+        return self._locks[i], self._stripes[i]
+    
+    def get(self, path, default = None):
+        lock, stripe = self._stripe(path)
+        with lock:
+            return stripe.get(path, default)
+    
+    def setdefault(self, path, document):
+        lock, stripe = self._stripe(path)
+        with lock:
+            return stripe.setdefault(path, document)
+    
+    def items(self):
+        items = []
+        for lock, stripe in zip(self._locks, self._stripes):
+            with lock:
+                items += stripe.items()
+        return items
+    
+    def pop(self, path, default = None):
+        lock, stripe = self._stripe(path)
+        with lock:
+            return stripe.pop(path, default)
+    
+    def clear(self):
+        for lock, stripe in zip(self._locks, self._stripes):
+            with lock:
+                stripe.clear()
+    
+    def stats(self):
+        stats = None
+        for lock, stripe in zip(self._locks, self._stripes):
+            with lock:
+                _stats = stripe.stats()
+            if stats is None:
+                stats = _stats
+            else:
+                for key in ["documents", "virtual", "live", "bytes", "hits", "misses", "evictions", "max_documents", "max_bytes", "max_virtual"]:
+                    stats[key] += _stats[key]
+        stats["stripes"] = len(self._stripes)
+        return stats
+    
+    #endregion 📌Methods
+
 #endregion 📌Common
 
 #region 📌Logic
 
 class DocumentLogicContainer():   
     
+    # Thousands of these live at once, slots and packed flags keep them small
+    __slots__ = ["_", "__", "_key", "_keys", "_parent_logic", "_loaded", "_fields", "_flags", "descendant_expected"]
+    
     #region 📌Magic
     
     def __init__(self, _, key, obj, parent_logic, virtual):
-        self.uuid = str(uuid.uuid4())
         self._ = _
         self.__ = _.__dict__
         self._key = key
         self._keys = []
-        self._path = f"{parent_logic.path(True)}/{key}"
         self._parent_logic = parent_logic
-        self._iteration = None
+        self._loaded = None
+        self._fields = None
+        self._flags = 0
         
-        self.static = False
-        self.debug = False      
         self.virtual = virtual
         self.protected = parent_logic.protected
         
         self.descendant_expected = None
-        self.descendant_create = False
-        self.descendant_rewrite = False
-        self.descendant_exception = False
         
         self._reload(obj) 
     
+    static = flag(FLAG_STATIC)
+    debug = flag(FLAG_DEBUG)
+    virtual = flag(FLAG_VIRTUAL)
+    protected = flag(FLAG_PROTECTED)
+    descendant_create = flag(FLAG_DESCENDANT_CREATE)
+    descendant_rewrite = flag(FLAG_DESCENDANT_REWRITE)
+    descendant_exception = flag(FLAG_DESCENDANT_EXCEPTION)
+    
     def __call__(self):
         return self._
     
@@ -246,75 +1370,76 @@ class DocumentLogicContainer():
     def __repr__(self) -> str:
         return f"🧩logic({self.repr()})"
     
-    def _reload(self, obj):
+    def _reload(self, obj, partial = False, primary = False):
         mongo = None
         _self = self._ 
         if obj is None:
             _parent = self.parent()
             if isinstance(_parent, EndlessCollection):
-                mongo = self.mongo()
+                if primary:
+                    mongo = self.mongo()
+                else:
+                    mongo = self.reader()
                 if mongo is None:
                     collection = self.collection()
                     collection().reload()
                     return                    
                 else:
-                    obj = mongo.find_one({"_id": self._key})
+                    obj = mongo.find_one({"_id": self._key}, self.projection())
+                    self._loaded = time.monotonic()
                     if obj is None:
                         self.virtual = True
                         return
                     else:
                         self.virtual = False                        
             else:
-                _parent()._reload(None)
+                _parent()._reload(None, primary=primary)
                 return       
-            
-        if self._key is None:
-            path = self._path.split("/")
-            try:
-                self._key = int(path[-1])
-                pass
-            except:
-                self._key = path[-1]
+        elif not partial and isinstance(self._parent_logic, CollectionLogicContainer):
+            self._loaded = time.monotonic()
             
         virtual = self.virtual
                        
-        _keys  = self._keys.copy()
-        self._keys.clear()
-        _path = f"{self.path(True)}"
+        # Keys are rebuilt aside and swapped in, readers never see a half-built list
+        _keys = self._keys
+        if partial:
+            keys = list(_keys)
+        else:
+            keys = []
         _edb = self.edb()
         for _key in obj:
             value = obj[_key]
-            self._keys.append(_key)  
+            if isinstance(_key, str):
+                # Documents of a collection share their field names
+                _key = sys.intern(_key)
+            if not partial or _key not in keys:
+                keys.append(_key)  
             
             if isinstance(value, bson.dbref.DBRef):
-                value = _edb[value.collection][value.id]                                
+                reference = self.__.get(_key)
+                if isinstance(reference, EndlessReference) and reference._ref == value:
+                    value = reference
+                else:
+                    value = EndlessReference(_edb, value, self.root())
                 
             if self.descendant_expected is None:
-                if isinstance(value, EndlessDocument) or isinstance(value, dict):                
+                if isinstance(value, EndlessReference):
+                    self.__[_key] = value
+                elif isinstance(value, EndlessDocument) or isinstance(value, dict):                
                     if self.static:                
                         if _key in self.__ and isinstance(self.__[_key], EndlessDocument):
-                            _self[_key]()._reload(value)
+                            _self[_key]()._reload(value, partial)
                         else:
                             self.__[_key] = self.descendant(_key, value, virtual, False)                       
                     else:
                         if isinstance(value, EndlessDocument) and isinstance(value().parent(), EndlessCollection):
                             document = value
                         else:    
-                            _property_path = f"{_path}/{_key}"
-                            if mongo is None:
-                                document = self.descendant(_key, value, virtual, False)                                    
+                            if partial and isinstance(self.__.get(_key), EndlessDocument):
+                                document = self.__[_key]
+                                document()._reload(value, partial)
                             else:
-                                documents = self.edb()().documents()
-                                if _property_path in documents:
-                                    document = documents[_property_path]
-                                else:
-                                    document = None
-                                
-                                if document is not None:
-                                    document()._reload(value)
-                                else:
-                                    document = self.descendant(_key, value, virtual, False) 
-                                    documents[_property_path] = document
+                                document = self.descendant(_key, value, virtual, False)                                    
                             
                         self.__[_key] = document
                 else:
@@ -330,10 +1455,11 @@ class DocumentLogicContainer():
                 
                 if isinstance(value, _type):
                     self.__[_key] = value                    
-                
-        for _key in _keys:
-            if _key not in self._keys:
-                del self.__[_key]                        
+        
+        self._keys = keys
+        if not partial:
+            for _key in set(_keys).difference(keys):
+                self.__.pop(_key, None)                        
             
     def repr(self, srepr = None) -> str:
         parent = self.parent()
@@ -343,6 +1469,9 @@ class DocumentLogicContainer():
         
         repr += "📑"
         
+        if self.fields() is not None:
+            repr += "✂️"
+        
         if self.descendant_expected is not None:
             repr += "🔎"
         else:
@@ -369,13 +1498,20 @@ class DocumentLogicContainer():
     def descendant(self, key, obj, virtual = False, reload = True):
         edb = self.edb()
         if edb is not None:
-            documents = self.edb()().documents()
+            documents = edb().documents()
             _path = f"{self.path(True)}/{key}"
-            if _path in documents:
-                property = documents[_path]
-            else:
-                property = EndlessDocument(key, obj, self, virtual)
-                documents[_path] = property
+            property = documents.get(_path)
+            if property is not None:
+                # Children of another instance of this document are not reused
+                if property()._parent_logic is self:
+                    if obj is not None:
+                        property()._reload(obj)
+                    property().virtual = virtual
+                    return property
+            
+            property = EndlessDocument(key, obj, self, virtual)
+            documents[_path] = property
+            return property
         
         return EndlessDocument(key, obj, self, virtual)
 
@@ -397,7 +1533,7 @@ class DocumentLogicContainer():
         
     def path(self, full = False):
         if full:
-            return self._path
+            return f"{self._parent_logic.path(True)}/{self._key}"
         else:
             return self.relative_path();    
     
@@ -410,22 +1546,215 @@ class DocumentLogicContainer():
     def mongo(self) -> pymongo.collection.Collection:
         return self.collection()().mongo()
     
-    def reload(self):
+    def reader(self) -> pymongo.collection.Collection:
+        return self.collection()().reader()
+    
+    def reload(self, primary = False):
         #if not self.virtual:
-        self._reload(None)
+        with self.edb()().operation("reload"):
+            self._reload(None, primary=primary)
         return self._  
     
+    def prefetch(self, paths):
+        self.edb()().prefetch([self._], paths)
+        return self._
+    
+    def root(self):
+        if isinstance(self._parent_logic, CollectionLogicContainer):
+            return self
+        
+        return self._parent_logic.root()
+    
+    def field(self, key = None):
+        _path = self.relative_path().split("/")[1:]
+        if key is not None:
+            _path.append(str(key))
+        return ".".join(_path)
+    
+    def fields(self):
+        return self.root()._fields
+    
+    def projection(self):
+        if self._fields is None:
+            return None
+        
+        return {field: 1 for field in self._fields}
+    
+    def covers(self, fields):
+        _fields = self.fields()
+        for field in fields:
+            if not covers_path(_fields, field):
+                return False
+        return True
+    
+    def load(self, fields = None):
+        root = self.root()
+        if root is not self:
+            if fields is None:
+                root.load([self.field()])
+            else:
+                root.load([self.field(field) for field in fields])
+            return self._
+        
+        if fields is None:
+            projection = None
+        else:
+            fields = [str(field) for field in fields]
+            projection = {field: 1 for field in fields}
+        
+        with self.edb()().operation("load"):
+            obj = self.reader().find_one({"_id": self._key}, projection)
+        if obj is None:
+            self._fields = None
+            self._loaded = time.monotonic()
+            self.virtual = True
+        else:
+            self._load(obj, fields)
+        
+        return self._
+    
+    def _load(self, obj, fields = None):
+        self.virtual = False
+        if fields is None:
+            self._fields = None
+            self._reload(obj)
+        elif self._fields is None and self._loaded is None:
+            self._fields = list(fields)
+            self._reload(obj)
+        elif self._fields is None:
+            self._reload(obj, True)
+        else:
+            self._fields = self._fields + [field for field in fields if not covers_path(self._fields, field)]
+            self._reload(obj, True)
+    
+    def invalidate(self):
+        if isinstance(self._parent_logic, CollectionLogicContainer):
+            self._loaded = None
+        else:
+            self._parent_logic.invalidate()
+        return self._
+    
     def delete(self):
         if isinstance(self._parent_logic, CollectionLogicContainer):
-            self.mongo().delete_one({ "_id": self._key })
+            with self.edb()().operation("delete"):
+                result = self.mongo().delete_one({ "_id": self._key })
+            self._parent_logic.counted(-result.deleted_count)
             documents = self._parent_logic.edb()().documents()
-            path = self.path(True)
-            if path in documents:
-                document = documents[path]
+            document = documents.pop(self.path(True), None)
+            if document is not None:
                 document().virtual = True
-                del documents[path]
         else:
             self._parent_logic.delete()
+    
+    def inc(self, key, value = 1):
+        return self.update("$inc", key, value)
+    
+    def push(self, key, value):
+        return self.update("$push", key, value)
+    
+    def add_to_set(self, key, value):
+        return self.update("$addToSet", key, value)
+    
+    def min(self, key, value):
+        return self.update("$min", key, value)
+    
+    def max(self, key, value):
+        return self.update("$max", key, value)
+    
+    def unset(self, key):
+        return self.update("$unset", key, "")
+    
+    def update(self, operator, key, value):
+        if self.protected:
+            raise Exception(f"{self} is protected and read-only")
+        
+        collection = self.collection()()
+        mongo = collection.mongo()
+        if mongo is None:
+            raise Exception(f"{self} is read-only")
+        
+        # Cached lists hold DBRefs, as the server returns them on reload
+        if isinstance(value, EndlessReference):
+            value = value._ref
+        elif isinstance(value, EndlessDocument):
+            ref = value().to_ref()
+            value = bson.dbref.DBRef(ref["$ref"], ref["$id"])
+        
+        root = self.root()
+        field = self.field(key)
+        if collection.batching():
+            if operator in ["$push", "$addToSet"]:
+                value = {"$each": [value]}
+            collection.stage(root._key, {operator: {field: value}})
+            return self._
+        
+        with self.edb()().operation("update"):
+            # Removing a field from a missing document must not create it
+            result = mongo.update_one({"_id": root._key}, {operator: {field: value}}, upsert=operator != "$unset")
+        if result.upserted_id is not None:
+            collection.counted(1)
+        
+        root.patch(operator, field, value)
+        return self._
+    
+    def patch(self, operator, field, value):
+        # Apply an update operator to the cached copy, the server already holds the result
+        if self._loaded is None and not self.virtual:
+            return
+        if self._fields is not None and not covers_path(self._fields, field):
+            self.invalidate()
+            return
+        
+        keys = field.split(".")
+        container = self
+        for i in range(len(keys) - 1):
+            child = container.__.get(keys[i])
+            if not isinstance(child, EndlessDocument):
+                if child is not None:
+                    # Array indexes and scalars along the path are only known to the server
+                    self.invalidate()
+                    return
+                break
+            container = child()
+        else:
+            i = len(keys) - 1
+        
+        leaf = keys[-1]
+        if operator == "$unset":
+            if i == len(keys) - 1 and leaf in container._keys:
+                container._keys = [_key for _key in container._keys if _key != leaf]
+                container.__.pop(leaf, None)
+            return
+        
+        current = container.__.get(leaf) if i == len(keys) - 1 else None
+        if isinstance(current, EndlessDocument) \
+            or (operator in ["$push", "$addToSet"] and current is not None and not isinstance(current, list)):
+            self.invalidate()
+            return
+        try:
+            if operator == "$inc":
+                value = (current or 0) + value
+            elif operator == "$push":
+                value = list(current or []) + [value]
+            elif operator == "$addToSet":
+                values = list(current or [])
+                if value not in values:
+                    values.append(value)
+                value = values
+            elif operator == "$min" and current is not None:
+                value = min(current, value)
+            elif operator == "$max" and current is not None:
+                value = max(current, value)
+        except TypeError:
+            # Mixed BSON types compare by type order on the server, reload rather than guess
+            self.invalidate()
+            return
+        
+        obj = value
+        for _key in reversed(keys[i + 1:]):
+            obj = {_key: obj}
+        container._reload({keys[i]: obj}, True)
+        self.virtual = False
         
     def edb(self):
         if isinstance(self._parent_logic, CollectionLogicContainer):
@@ -460,6 +1789,9 @@ class DocumentLogicContainer():
             ref_to_id = True
         else:
             ref_to_id = False
+        
+        if self.fields() is not None:
+            self.root().load()
             
         _self = self._
         for key in self._keys:
@@ -474,7 +1806,9 @@ class DocumentLogicContainer():
                 continue
                 
             value = _self[key]
-            if isinstance(value, EndlessDocument):
+            if isinstance(value, EndlessReference) and ref_to_id:
+                yield (_key, value.id)
+            elif isinstance(value, EndlessDocument) or isinstance(value, EndlessReference):
                 if ref_to_id:
                     data = value().key()
                 else:
@@ -516,6 +1850,18 @@ class CollectionLogicContainer():
         self.protected = False
         self.static = False
         self.debug = False
+        self.cache = None
+        self.ttl = None
+        self.fields = None
+        self.batch_size = None
+        self.read_preference = None
+        self.read_concern = None
+        self._reader = None
+        self.count = None
+        self._count = None
+        self._counted = None
+        self._batch = None
+        self._batch_depth = 0
         
         if isinstance(key, PosixPath):
             _key = key.stem
@@ -535,6 +1881,7 @@ class CollectionLogicContainer():
             
         self._keys = []        
         self._key = _key
+        self._path = None
         
         self.defaults = defaults
             
@@ -572,31 +1919,122 @@ class CollectionLogicContainer():
         if self._edb is not None:
             _path = f"{self.path(True)}/{key}"
             documents = self._edb().documents()
-            if _path in documents:
-                document = documents[_path]
-                document().reload()            
-            else:
-                document = EndlessDocument(key, value, self, virtual)
-                if not self.debug:
-                    documents[_path] = document
+            document = documents.get(_path)
+            if document is not None:
+                if value is not None:
+                    document()._load(value)
+                    document().virtual = virtual
+                elif not self.fresh(document()):
+                    document().reload()            
+                return document
+            
+            document = EndlessDocument(key, value, self, virtual)
+            if not self.debug:
+                document = documents.setdefault(_path, document)
+            return document
         
         return EndlessDocument(key, value, self, virtual)
 
-    def len(self):
-        collection = self.mongo()
-        if collection is not None:            
+    def view(self, fields):
+        view = EndlessCollection(self._key, self._edb, None, self.defaults)
+        _view = view()
+        _view.protected = self.protected
+        _view.static = self.static
+        _view.debug = self.debug
+        _view.cache = self.cache
+        _view.ttl = self.ttl
+        _view.batch_size = self.batch_size
+        _view.read_preference = self.read_preference
+        _view.read_concern = self.read_concern
+        _view.count = self.count
+        _view.fields = [str(field) for field in fields]
+        return view
+    
+    def projection(self):
+        if self.fields is None:
+            return None
+        
+        return {field: 1 for field in self.fields}
+    
+    def policy(self):
+        if self.cache is not None:
+            return self.cache
+        
+        if self._edb is None:
+            return "always"
+        
+        edb = self._edb()
+        if edb.watching():
+            return "never"
+        
+        return edb.cfg().CACHE_POLICY or "always"
+    
+    def fresh(self, document):
+        if self.debug or document._loaded is None:
+            return False
+        
+        policy = self.policy()
+        if policy == "never":
+            return True
+        
+        if policy == "ttl":
+            if self.ttl is not None:
+                ttl = self.ttl
+            else:
+                ttl = self._edb().cfg().CACHE_TTL or 0
+            return time.monotonic() - document._loaded < ttl
+        
+        return False
+    
+    def invalidate(self):
+        if self._edb is not None:
+            _path = f"{self.path(True)}/"
+            documents = self._edb().documents()
+            for path, document in documents.items():
+                if path.startswith(_path):
+                    document().invalidate()
+        return self._
+    
+    def len(self, offline = False):
+        collection = self.reader()
+        if collection is None:            
+            return len(self._keys)
+        
+        strategy = self.counting()
+        with self._edb().operation("len"):
+            if strategy == "estimated":
+                return collection.estimated_document_count()
+            
+            if strategy in ["ttl", "offline"]:
+                ttl = self._edb().cfg().COUNT_TTL or 0
+                return cached_count(self, strategy, ttl, offline, partial(collection.count_documents, {}))
+            
             return collection.count_documents({})
+    
+    def counting(self):
+        if self.count is not None:
+            return self.count
         
-        return len(self._keys)
+        if self._edb is None:
+            return "exact"
+        
+        return self._edb().cfg().COUNT_STRATEGY or "exact"
+    
+    def counted(self, delta):
+        if self._count is not None:
+            self._count += delta
     
     def key(self):
         return self._key
     
     def path(self, full = True):
         if full:
-            if self._edb is None:            
-                return f"yml/{self._key}"
-            return f"{self._edb().key()}/{self._key}"
+            if self._path is None:
+                if self._edb is None:            
+                    self._path = f"yml/{self._key}"
+                else:
+                    self._path = f"{self._edb().key()}/{self._key}"
+            return self._path
         else:
             return self._key
         
@@ -617,7 +2055,8 @@ class CollectionLogicContainer():
                 repr += "🔓"
             
             repr += f"{self._key}"
-            repr += "{" + f"ℓ{self.len()}" + "}"
+            count = self.len(offline=True)
+            repr += "{" + f"ℓ{'?' if count is None else count}" + "}"
             
         if srepr is not None:
             repr += f'/{srepr}'        
@@ -627,16 +2066,42 @@ class CollectionLogicContainer():
         else:
             return parent().repr(repr)            
     
-    def keys(self):
+    def keys(self, after = None, limit = 0):
         if self._collection is None:
-            return self._keys
+            keys = self._keys
+            if after in keys:
+                keys = keys[keys.index(after) + 1:]
+            elif after is not None:
+                keys = [key for key in keys if id_after(key, after)]
+            if limit > 0:
+                keys = keys[:limit]
+            return iter(keys)
         
-        try:
-            return self._collection.distinct("_id")
-        except Exception as e:
-            keys = []   
-            
-        return keys    
+        return self._ids(after, limit)
+    
+    def _ids(self, after, limit):
+        # An _id only projection sorted by _id is answered from the _id index alone
+        operation = self._edb().operation("keys")
+        for _filter in id_filters(after):
+            with operation:
+                cursor = self.reader().find(_filter, {"_id": 1}, sort=[("_id", 1)], limit=limit, batch_size=self.cursor_size())
+            for obj in attributed(operation, cursor):
+                yield obj["_id"]
+                if limit > 0:
+                    limit -= 1
+                    if limit == 0:
+                        return
+    
+    def contains(self, key):
+        if self._collection is None:
+            return key in self._keys
+        
+        document = self._edb().documents().get(f"{self.path(True)}/{key}")
+        if document is not None and self.fresh(document()):
+            return not document().virtual
+        
+        with self._edb().operation("contains"):
+            return self.reader().find_one({"_id": key}, {"_id": 1}) is not None
         
     def set(self, path: str, value: Any, descendant_expected = None):
         if self.protected:
@@ -653,6 +2118,23 @@ class CollectionLogicContainer():
             _path = path.split(".")
             path_length = len(_path)   
             
+            try:
+                _id = int(_path[0])
+                pass
+            except:
+                _id = _path[0]
+            
+            if self.batching():
+                if isinstance(value, EndlessReference):
+                    value = value._ref
+                elif isinstance(value, EndlessDocument):
+                    value = value().to_ref()
+                if path_length == 1:
+                    self.stage(_id, { "$set": value })
+                else:
+                    self.stage(_id, { "$set": { ".".join(_path[1:]): value } })
+                return
+            
             if path_length == 1:
                 _data = { "$set": value }
             else:
@@ -662,38 +2144,172 @@ class CollectionLogicContainer():
                     _currentPath[_path[i]] = {}
                     if i < path_length - 1:
                         _currentPath = _currentPath[_path[i]]                    
-                if isinstance(value, EndlessDocument):
+                if isinstance(value, EndlessReference):
+                    _currentPath[_path[i]] = value._ref
+                elif isinstance(value, EndlessDocument):
                     _value = value()
                     _currentPath[_path[i]] = _value.to_ref()
                 else:
                     _currentPath[_path[i]] = value
             
-            try:
-                _id = int(_path[0])
-                pass
-            except:
-                _id = _path[0]
+            with self._edb().operation("set"):
+                result = collection.update_one({ "_id": _id }, _data, upsert=True)        
+                if result.upserted_id is not None:
+                    self.counted(1)
+                #if not isinstance(value, dict):
+                _path = f"{self.path(True)}/{_path[0]}"
+                documents = self._edb().documents()
+                #_path = f"{self._key}.{path}"
+                document = documents.get(_path)
+                if document is not None:
+                    document().reload(primary=True)
+    
+    def batching(self):
+        if self._batch is None and self._edb is not None:
+            edb = self._edb()
+            if edb._batch is not None:
+                self._batch = {}
+                edb._batch.append(self)
+        
+        return self._batch is not None
+    
+    @contextmanager
+    def batch(self):
+        if self.mongo() is None:
+            raise Exception(f"{self} is read-only")
+        
+        if not self.batching():
+            self._batch = {}
+        
+        self._batch_depth += 1
+        try:
+            yield self._
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and (self._edb is None or self._edb()._batch is None):
+                self._batch = None
+            raise
+        
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and (self._edb is None or self._edb()._batch is None):
+            self.flush()
+    
+    def stage(self, _id, update):
+        if _id not in self._batch:
+            self._batch[_id] = {}
+        staged = self._batch[_id]
+        for operator in update:
+            if operator not in staged:
+                staged[operator] = PathTree()
+            for path, value in update[operator].items():
+                if operator != "$set":
+                    previous = find_path(staged[operator], path)
+                    if previous is not None:
+                        value = combine_update(operator, previous, value)
+                merge_path(staged[operator], path, value)
+    
+    def flush(self):
+        batch = self._batch
+        self._batch = None
+        if not batch:
+            return None
+        
+        requests = []
+        for _id in batch:
+            update = {}
+            for operator in batch[_id]:
+                update[operator] = dict(flatten_path(batch[_id][operator]))
+            requests.append(pymongo.UpdateOne({ "_id": _id }, update, upsert=list(update) != ["$unset"]))
+        
+        with self._edb().operation("flush"):
+            result = self.mongo().bulk_write(requests, ordered=False)
+            self.counted(result.upserted_count)
             
-            collection.update_one({ "_id": _id }, _data, upsert=True)        
-            #if not isinstance(value, dict):
-            _path = f"{self.path(True)}/{_path[0]}"
             documents = self._edb().documents()
-            #_path = f"{self._key}.{path}"
-            if _path in documents:
-                documents[_path]().reload()
-    
-    def find(self, filter):
-        r = self.mongo().find(filter, {"_id": 1})
-        if r is not None and len(r) > 0:
-            for document in r:
-                yield self.descendant(document["_id"], None)
-        else:
-            yield None
+            cached = {}
+            for _id in batch:
+                document = documents.get(f"{self.path(True)}/{_id}")
+                if document is not None:
+                    cached[_id] = document
+            
+            if len(cached) > 0:
+                for obj in self.mongo().find({ "_id": { "$in": list(cached) } }):
+                    cached[obj["_id"]]()._load(obj)
         
-    def find_one(self, filter):
-        document = self.mongo().find_one(filter, {"_id": 1})
+        return result
+    
+    def hydrate(self, obj, fields = None):
+        key = obj["_id"]
+        _path = f"{self.path(True)}/{key}"
+        documents = self._edb().documents()
+        document = documents.get(_path)
         if document is not None:
-            return self.descendant(document["_id"], None)       
+            document()._load(obj, fields)
+        else:
+            document = EndlessDocument(key, obj, self)
+            if fields is not None:
+                document()._fields = [str(field) for field in fields]
+            if not self.debug:
+                document = documents.setdefault(_path, document)
+        
+        return document
+    
+    def cursor_size(self):
+        if self.batch_size is not None:
+            return self.batch_size
+        
+        return self._edb().cfg().CURSOR_BATCH_SIZE or 0
+    
+    def find(self, filter = None, fields = None, sort = None, skip = 0, limit = 0, batch_size = None, hint = None, prefetch = None):
+        if filter is None:
+            filter = {}
+        
+        if fields is None:
+            fields = self.fields
+            projection = self.projection()
+        else:
+            fields = [str(field) for field in fields]
+            projection = {field: 1 for field in fields}
+        
+        if batch_size is None:
+            batch_size = self.cursor_size()
+        
+        operation = self._edb().operation("find")
+        with operation:
+            cursor = self.reader().find(filter, projection, sort=sort, skip=skip, limit=limit, batch_size=batch_size, hint=hint)
+        if prefetch is None:
+            for obj in attributed(operation, cursor):
+                yield self.hydrate(obj, fields)
+        else:
+            # Prefetch references once per batch of documents rather than per document
+            documents = []
+            for obj in attributed(operation, cursor):
+                documents.append(self.hydrate(obj, fields))
+                if len(documents) >= (batch_size or 100):
+                    yield from self._edb().prefetch(documents, prefetch)
+                    documents = []
+            
+            if len(documents) > 0:
+                yield from self._edb().prefetch(documents, prefetch)
+        
+    def find_one(self, filter = None, fields = None, sort = None, hint = None, prefetch = None):
+        if filter is None:
+            filter = {}
+        
+        if fields is None:
+            fields = self.fields
+            projection = self.projection()
+        else:
+            fields = [str(field) for field in fields]
+            projection = {field: 1 for field in fields}
+        
+        with self._edb().operation("find"):
+            obj = self.reader().find_one(filter, projection, sort=sort, hint=hint)
+        if obj is not None:
+            document = self.hydrate(obj, fields)
+            if prefetch is not None:
+                self._edb().prefetch([document], prefetch)
+            return document
         else:
             return None
         
@@ -713,6 +2329,37 @@ class CollectionLogicContainer():
     def mongo(self) -> pymongo.collection.Collection:
         return self._collection
     
+    def reader(self) -> pymongo.collection.Collection:
+        # Reads and cursors honour the read preference, writes always use mongo() and the primary
+        if self._reader is None and self._collection is not None:
+            read_preference = self.read_preference
+            read_concern = self.read_concern
+            if self._edb is not None:
+                cfg = self._edb().cfg()
+                if read_preference is None:
+                    read_preference = (cfg.COLLECTION_READ_PREFERENCE or {}).get(self._key, cfg.READ_PREFERENCE)
+                if read_concern is None:
+                    read_concern = (cfg.COLLECTION_READ_CONCERN or {}).get(self._key, cfg.READ_CONCERN)
+            
+            options = {}
+            if read_preference is not None:
+                if isinstance(read_preference, str):
+                    if read_preference not in READ_PREFERENCES:
+                        raise Exception(f"Read preference must be one of {list(READ_PREFERENCES)}")
+                    read_preference = READ_PREFERENCES[read_preference]
+                options["read_preference"] = read_preference
+            if read_concern is not None:
+                if isinstance(read_concern, str):
+                    read_concern = pymongo.read_concern.ReadConcern(read_concern)
+                options["read_concern"] = read_concern
+            
+            if len(options) > 0:
+                self._reader = self._collection.with_options(**options)
+            else:
+                self._reader = self._collection
+        
+        return self._reader
+    
     def collections(self):
         return self._parent_logic.collections()
     
@@ -727,14 +2374,16 @@ class CollectionLogicContainer():
         if self._key in collections:
             del collections[self._key]
             
-        self._collection.drop()
+        with self._edb().operation("delete"):
+            self._collection.drop()
+        self._count = 0
+        if self._edb is not None:
+            self._edb()._count = None
         self.virtual = True
     
     def to_dict(self, *args, **kwargs):
-        _self = self._
-        keys = self.keys()
-        for key in keys:
-            data = dict(_self[key]().to_dict(**kwargs))
+        for key, document in self._:
+            data = dict(document().to_dict(**kwargs))
             yield (key, data)
     
     def to_json(self, *args, **kwargs):
@@ -756,7 +2405,149 @@ class CollectionLogicContainer():
         _yaml = yaml.dump(_dict, default_flow_style=False, allow_unicode=True)           
         return _yaml
     
-    def from_yml(self, path): 
+    def export(self, path, format = "jsonl", filter = None, batch_size = None, **kwargs):
+        if format not in EXPORT_FORMATS:
+            raise Exception(f"Export format must be one of {EXPORT_FORMATS}")
+        
+        collection = self.reader()
+        if collection is None:
+            raise Exception(f"{self} has no collection to export")
+        
+        # Raw cursor batches, exported documents never enter the identity map
+        documents = 0
+        if batch_size is None:
+            batch_size = self.cursor_size()
+        operation = self._edb().operation("export")
+        with operation:
+            cursor = collection.find(filter or {}, batch_size=batch_size)
+        with export_stream(path, **kwargs) as (writer, stream):
+            for obj in attributed(operation, cursor):
+                writer.write(export_record(obj, format))
+                documents += 1
+        
+        return {
+            "collection": self._key,
+            "path": str(path) if isinstance(path, (str, Path)) else None,
+            "format": format,
+            "documents": documents,
+            "bytes": stream.bytes,
+            "sha256": stream.sha256()
+        }
+    
+    def ranges(self, split):
+        # _id ranges of roughly split documents each, so large collections can be exported in parallel
+        collection = self.reader()
+        if split is None or split <= 0 or collection is None:
+            return [None]
+        
+        parts = -(-collection.estimated_document_count() // split)
+        if parts < 2:
+            return [None]
+        
+        first = collection.find_one({}, {"_id": 1}, sort=[("_id", 1)])
+        last = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        if first is None or id_bracket(first["_id"]) != id_bracket(last["_id"]):
+            return [None]
+        
+        sample = [obj["_id"] for obj in collection.aggregate([{"$sample": {"size": parts * 32}}, {"$project": {"_id": 1}}])]
+        try:
+            sample.sort()
+        except TypeError:
+            return [None]
+        
+        boundaries = sorted(set(sample[len(sample) * i // parts] for i in range(1, parts)))
+        filters = []
+        lower = None
+        for boundary in boundaries:
+            if lower is None:
+                filters.append({"_id": {"$lt": boundary}})
+            else:
+                filters.append({"_id": {"$gte": lower, "$lt": boundary}})
+            lower = boundary
+        filters.append({"_id": {"$gte": lower}})
+        return filters
+    
+    def bulk_import(self, source, format = None, mode = "upsert", batch_size = 1000, ordered = False, progress = None, **kwargs):
+        if self.protected:
+            raise Exception(f"{self} is protected and read-only")
+        
+        collection = self.mongo()
+        if collection is None:
+            raise Exception(f"{self} is read-only")
+        
+        if mode not in ["upsert", "insert"]:
+            raise Exception("Import mode must be one of ['upsert', 'insert']")
+        
+        if format is None and isinstance(source, (str, Path)):
+            format = import_format(source)
+        if format is None:
+            format = "jsonl"
+        
+        result = {
+            "collection": self._key,
+            "documents": 0,
+            "inserted": 0,
+            "upserted": 0,
+            "modified": 0,
+            "batches": 0,
+            "seconds": 0
+        }
+        started = time.monotonic()
+        
+        def write(batch):
+            _started = time.monotonic()
+            if mode == "insert":
+                with self._edb().operation("import"):
+                    inserted = len(collection.insert_many(batch, ordered=ordered).inserted_ids)
+                upserted = modified = 0
+            else:
+                requests = []
+                for obj in batch:
+                    if "_id" in obj:
+                        requests.append(pymongo.ReplaceOne({"_id": obj["_id"]}, obj, upsert=True))
+                    else:
+                        requests.append(pymongo.InsertOne(obj))
+                with self._edb().operation("import"):
+                    _result = collection.bulk_write(requests, ordered=ordered)
+                inserted = _result.inserted_count
+                upserted = _result.upserted_count
+                modified = _result.modified_count
+            
+            seconds = time.monotonic() - _started
+            result["documents"] += len(batch)
+            result["inserted"] += inserted
+            result["upserted"] += upserted
+            result["modified"] += modified
+            result["batches"] += 1
+            self.counted(inserted + upserted)
+            if progress is not None:
+                progress({
+                    "collection": self._key,
+                    "batch": result["batches"],
+                    "documents": result["documents"],
+                    "batch_documents": len(batch),
+                    "batch_seconds": seconds,
+                    "rate": len(batch) / seconds if seconds > 0 else None,
+                    "seconds": time.monotonic() - started
+                })
+        
+        with import_stream(source, **kwargs) as text:
+            batch = []
+            for obj in import_records(text, format):
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    write(batch)
+                    batch = []
+            if len(batch) > 0:
+                write(batch)
+        
+        # Cached documents may have been replaced underneath
+        self.invalidate()
+        result["seconds"] = time.monotonic() - started
+        return result
+    
+    @staticmethod
+    def from_yml(path): 
         with open(path, 'r') as stream:
             try:         
                 yml = yaml.safe_load(stream)
@@ -782,20 +2573,47 @@ class DatabaseLogicContainer():
     def __call__(self):
         return self._
         
-    def __init__(self, _, url = None, host = "localhost", port = 27017, user = "", password = ""):
+    def __init__(self, _, url = None, host = "localhost", port = 27017, user = "", password = "", threadsafe = None, database = None):
         self._cfg = EndlessConfiguration()
         self.debug = False
         self._ = _
         self.__ = _.__dict__          
         self._collections = {}
-        self._documents = {}
+        if threadsafe is None:
+            threadsafe = self._cfg.THREAD_SAFE == True
+        self.threadsafe = threadsafe
+        if self.threadsafe:
+            self._documents = StripedIdentityMap(
+                self._cfg.CACHE_MAX_DOCUMENTS, 
+                self._cfg.CACHE_MAX_BYTES, 
+                self._cfg.CACHE_MAX_VIRTUAL, 
+                self._cfg.CACHE_EVICTION or "lru",
+                self._cfg.THREAD_SAFE_STRIPES
+            )
+        else:
+            self._documents = IdentityMap(
+                self._cfg.CACHE_MAX_DOCUMENTS, 
+                self._cfg.CACHE_MAX_BYTES, 
+                self._cfg.CACHE_MAX_VIRTUAL, 
+                self._cfg.CACHE_EVICTION or "lru"
+            )
+        self._loading = {}
+        self._loading_lock = threading.Lock()
+        self._count = None
+        self._counted = None
+        self._batch = None
+        self._batch_depth = 0
+        self._instruments = Instruments()
+        self._watcher = None
+        self._watcher_stop = None
+        self._watcher_error = None
         self._defaults_collection = CollectionLogicContainer.from_yml(self._cfg.CONFIG_YML)
         defaults = self.defaults()
         
-        self._url = self.url_info(self._cfg.MONGO_URI)
-        self._key = self._cfg.MONGO_DATABASE
+        self._url = self.url_info(url or self._cfg.MONGO_URI)
+        self._key = database or self._cfg.MONGO_DATABASE
         
-        self._mongo = pymongo.MongoClient(self._cfg.MONGO_URI, connect=False)
+        self._mongo = mongo_client(self._url["url"], **self.pool())
         self._edb = self._mongo[self._key]
         
         self._collections[self._cfg.CONFIG_COLLECTION] = EndlessCollection(self._cfg.CONFIG_COLLECTION, self(), None, defaults, self._edb)
@@ -818,22 +2636,29 @@ class DatabaseLogicContainer():
             repr += "💿"
         
         repr += f"{self._key}"
-        repr += "{" + f"ℓ{self.len()}" + "}"
+        count = self.len(offline=True)
+        repr += "{" + f"ℓ{'?' if count is None else count}" + "}"
         
         if srepr is None:
             return f"{repr}"
         else:
             return f'{repr}/{srepr}'       
     
-    def len(self):
-        return len(self.keys())
+    def len(self, offline = False):
+        strategy = self._cfg.COUNT_STRATEGY or "exact"
+        with self.operation("len"):
+            if strategy in ["ttl", "offline"]:
+                return cached_count(self, strategy, self._cfg.COUNT_TTL or 0, offline, lambda: len(self.keys()))
+            
+            return len(self.keys())
     
     def key(self):
         return self._key
         
     def keys(self):
         _filter = {"name": {"$regex": r"^(?!^%s$).+$" % self._cfg.CONFIG_COLLECTION}}
-        return self.mongo().list_collection_names(filter=_filter)
+        with self.operation("keys"):
+            return self.mongo().list_collection_names(filter=_filter)
         
     def mongo(self) -> pymongo.database.Database:
         return self._edb
@@ -844,6 +2669,41 @@ class DatabaseLogicContainer():
     def config(self):
         return self._collections[self._cfg.CONFIG_COLLECTION]
     
+    def cfg(self):
+        return self._cfg
+    
+    def pool(self):
+        options = {
+            "maxPoolSize": self._cfg.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": self._cfg.MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": self._cfg.MONGO_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": self._cfg.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "compressors": self._cfg.MONGO_COMPRESSORS
+        }
+        if self._cfg.INSTRUMENTATION:
+            options["event_listeners"] = [COMMANDS]
+        return {key: value for key, value in options.items() if value is not None}
+    
+    def instruments(self):
+        return self._instruments
+    
+    def operation(self, name):
+        return Operation(self._instruments, name)
+    
+    @contextmanager
+    def profile(self, threshold = None, report = print):
+        if not self._cfg.INSTRUMENTATION:
+            raise Exception(f"Profiling needs INSTRUMENTATION enabled")
+        
+        profile = Profile(threshold or self._cfg.PROFILE_THRESHOLD)
+        token = _profile.set(profile)
+        try:
+            yield profile
+        finally:
+            _profile.reset(token)
+            if report is not None:
+                report(profile.report())
+    
     def defaults(self):
         return self._defaults_collection
     
@@ -853,50 +2713,351 @@ class DatabaseLogicContainer():
     def collections(self):
         return self._collections
     
-    def url_info(self, url):
-        pattern = r"(?i)^mongodb\:\/\/(?P<user>.*):(?P<password>.*)\@(?P<host>.*)\:(?P<port>\d+)\/(?P<database>.*)?\?(?P<paramaters>.*)?$"
-        masked = re.sub(pattern, partial(re_mask_subgroup, "password", "*"), url)
+    @contextmanager
+    def batch(self):
+        if self._batch is None:
+            self._batch = []
         
-        return {"url": url, "masked": masked}                  
+        self._batch_depth += 1
+        try:
+            yield self._
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                for collection in self._batch:
+                    collection._batch = None
+                self._batch = None
+            raise
+        
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            batch = self._batch
+            self._batch = None
+            for collection in batch:
+                collection.flush()
     
-    def build_url(self, host, port, user, password):        
-        return f"mongodb://{user}:{password}@{host}:{port}/?authMechanism=SCRAM-SHA-256"
+    def coalesce(self, path, load):
+        if not self.threadsafe:
+            return load()
+        
+        # Threads asking for a document that is already loading wait for that query instead of sending their own
+        with self._loading_lock:
+            loading = self._loading.get(path)
+            if loading is None:
+                loading = Future()
+                self._loading[path] = loading
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            return loading.result()
+        
+        try:
+            result = load()
+            loading.set_result(result)
+            return result
+        except BaseException as e:
+            loading.set_exception(e)
+            raise
+        finally:
+            with self._loading_lock:
+                del self._loading[path]
     
-    def to_dict(self):
-        _self = self._
-        keys = self.keys()
-        for key in keys:
-            data = dict(_self[key]().to_dict())
-            yield (key, data)            
+    def prefetch(self, documents, paths):
+        if isinstance(paths, str):
+            paths = [paths]
+        
+        for path in paths:
+            # Nodes travel with the root document holding them, references found on the way are bound to it
+            nodes = [(document().root(), document) for document in documents]
+            for key in path.split("."):
+                nodes = self.dereference(nodes)
+                _nodes = []
+                for owner, node in nodes:
+                    if isinstance(node, list):
+                        self.references(node, owner)
+                        if key == "*":
+                            _nodes.extend([(owner, item) for item in node])
+                        else:
+                            for item in node:
+                                if isinstance(item, dict) and key in item:
+                                    self.references(item, owner)
+                                    _nodes.append((owner, item[key]))
+                    elif isinstance(node, EndlessDocument):
+                        owner = node().root()
+                        if key == "*":
+                            _nodes.extend([(owner, value) for _key, value in node.__dict__.items() if _key != "***"])
+                        elif key in node.__dict__:
+                            _nodes.append((owner, node.__dict__[key]))
+                    elif isinstance(node, dict):
+                        self.references(node, owner)
+                        if key == "*":
+                            _nodes.extend([(owner, value) for value in node.values()])
+                        elif key in node:
+                            _nodes.append((owner, node[key]))
+                nodes = self.dereference(_nodes)
+        
+        return documents
+    
+    def references(self, container, owner):
+        # Raw DBRefs in lists and embedded documents are swapped in place for references that can be bound
+        items = enumerate(container) if isinstance(container, list) else list(container.items())
+        for key, value in items:
+            if isinstance(value, bson.dbref.DBRef):
+                container[key] = EndlessReference(self._, value, owner)
+    
+    def dereference(self, nodes):
+        documents = self._documents
+        ids = {}
+        for owner, node in nodes:
+            if isinstance(node, EndlessReference):
+                ref = node._ref
+            elif isinstance(node, bson.dbref.DBRef):
+                ref = node
+            else:
+                continue
             
-    def to_json(self, *args, **kwargs):
-        if "base64" in kwargs and kwargs["base64"]:
-            to_base64 = kwargs.pop("base64")
-        else:
-            to_base64 = False
+            path = f"{self._key}/{ref.collection}/{ref.id}"
+            collection = self._[ref.collection]()
+            document = documents.get(path)
+            if document is not None and collection.fresh(document()):
+                continue
             
-        _dict = dict(self.to_dict())
-        _json = json.dumps(_dict, default=json_default_encoder, ensure_ascii=False)
+            if ref.collection not in ids:
+                ids[ref.collection] = {}
+            ids[ref.collection][path] = ref.id
         
-        if to_base64:
-            return base64.b64encode(_json.encode("utf-8")).decode("utf-8")
-                   
-        return _json    
-
-    def to_yml(self):
-        _dict = dict(self.to_dict())
-        _yaml = yaml.dump(_dict, default_flow_style=False, allow_unicode=True)           
-        return _yaml
+        for key in ids:
+            collection = self._[key]()
+            with self.operation("prefetch"):
+                for obj in collection.reader().find({"_id": {"$in": list(ids[key].values())}}):
+                    collection.hydrate(obj)
+        
+        _nodes = []
+        for owner, node in nodes:
+            if isinstance(node, EndlessReference) or isinstance(node, bson.dbref.DBRef):
+                if isinstance(node, EndlessReference):
+                    ref = node._ref
+                else:
+                    ref = node
+                document = documents.get(f"{self._key}/{ref.collection}/{ref.id}")
+                if document is not None:
+                    if isinstance(node, EndlessReference):
+                        node._bind(document)
+                    node = document
+            _nodes.append((owner, node))
+        
+        return _nodes
+    
+    def watch(self, timeout = 10):
+        if self.watching():
+            return self._
+        
+        # The watcher thread patches cached documents, the identity map has to take locks from now on
+        if not isinstance(self._documents, StripedIdentityMap):
+            documents = StripedIdentityMap(
+                self._cfg.CACHE_MAX_DOCUMENTS, 
+                self._cfg.CACHE_MAX_BYTES, 
+                self._cfg.CACHE_MAX_VIRTUAL, 
+                self._cfg.CACHE_EVICTION or "lru",
+                self._cfg.THREAD_SAFE_STRIPES
+            )
+            for path, document in list(self._documents._live.items()):
+                documents[path] = document
+            self._documents = documents
+        
+        self._watcher_stop = threading.Event()
+        self._watcher_error = None
+        ready = threading.Event()
+        self._watcher = threading.Thread(
+            target=self._watch, 
+            args=(ready, self._watcher_stop), 
+            name=f"endlessdb-watcher-{self._key}", 
+            daemon=True
+        )
+        self._watcher.start()
+        ready.wait(timeout)
+        
+        if self._watcher_error is not None:
+            self._watcher = None
+            raise Exception(f"{self} can not watch changes: {self._watcher_error}")
+        
+        return self._
+    
+    def unwatch(self):
+        watcher = self._watcher
+        if watcher is not None:
+            self._watcher_stop.set()
+            watcher.join()
+            self._watcher = None
+        
+        return self._
+    
+    def watching(self):
+        return self._watcher is not None and self._watcher.is_alive()
+    
+    def _watch(self, ready, stop):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete", "drop", "dropDatabase", "invalidate"]}}}]
+        token = None
+        while not stop.is_set():
+            try:
+                with self._edb.watch(pipeline, full_document="updateLookup", resume_after=token, max_await_time_ms=500) as stream:
+                    ready.set()
+                    while stream.alive and not stop.is_set():
+                        change = stream.try_next()
+                        token = stream.resume_token
+                        if change is not None:
+                            self._change(change)
+                            if change["operationType"] == "invalidate":
+                                token = None
+            except pymongo.errors.PyMongoError as e:
+                if not ready.is_set():
+                    self._watcher_error = e
+                    ready.set()
+                    return
+                
+                # Events may be lost while the stream is down, nothing cached can be trusted
+                for path, document in self._documents.items():
+                    document().invalidate()
+                token = None
+                stop.wait(1)
+    
+    def _change(self, change):
+        operation = change["operationType"]
+        documents = self._documents
+        if operation in ["drop", "dropDatabase", "invalidate"]:
+            if "ns" in change and "coll" in change["ns"]:
+                _path = f"{self._key}/{change['ns']['coll']}/"
+            else:
+                _path = f"{self._key}/"
+            for path, document in documents.items():
+                if path.startswith(_path):
+                    document().invalidate()
+            return
+        
+        path = f"{self._key}/{change['ns']['coll']}/{change['documentKey']['_id']}"
+        document = documents.get(path)
+        if document is None:
+            return
+        
+        if operation == "delete":
+            document().virtual = True
+            documents.pop(path, None)
+        elif change.get("fullDocument") is None:
+            document().invalidate()
+        else:
+            document()._load(change["fullDocument"])
+    
+    def url_info(self, url):
+        pattern = r"(?i)^mongodb\:\/\/(?P<user>.*):(?P<password>.*)\@(?P<host>.*)\:(?P<port>\d+)\/(?P<database>.*)?\?(?P<paramaters>.*)?$"
+        masked = re.sub(pattern, partial(re_mask_subgroup, "password", "*"), url)
+        
+        return {"url": url, "masked": masked}                  
+    
+    def build_url(self, host, port, user, password):        
+        return f"mongodb://{user}:{password}@{host}:{port}/?authMechanism=SCRAM-SHA-256"
+    
+    def to_dict(self):
+        _self = self._
+        keys = self.keys()
+        for key in keys:
+            data = dict(_self[key]().to_dict())
+            yield (key, data)            
+            
+    def to_json(self, *args, **kwargs):
+        if "base64" in kwargs and kwargs["base64"]:
+            to_base64 = kwargs.pop("base64")
+        else:
+            to_base64 = False
+            
+        _dict = dict(self.to_dict())
+        _json = json.dumps(_dict, default=json_default_encoder, ensure_ascii=False)
+        
+        if to_base64:
+            return base64.b64encode(_json.encode("utf-8")).decode("utf-8")
+                   
+        return _json    
+
+    def to_yml(self):
+        _dict = dict(self.to_dict())
+        _yaml = yaml.dump(_dict, default_flow_style=False, allow_unicode=True)           
+        return _yaml
+    
+    def export(self, path, format = "jsonl", workers = None, split = None, **kwargs):
+        if format not in EXPORT_FORMATS:
+            raise Exception(f"Export format must be one of {EXPORT_FORMATS}")
+        
+        if workers is None:
+            workers = self._cfg.EXPORT_WORKERS or 1
+        if split is None:
+            split = self._cfg.EXPORT_SPLIT_DOCUMENTS or 0
+        
+        path = Path(path)
+        parts_path = path / ".parts"
+        parts_path.mkdir(parents=True, exist_ok=True)
+        
+        # Workers write gzip parts per collection or _id range, base64 is applied once when parts are joined
+        to_base64 = kwargs.get("base64", False)
+        compress = kwargs.get("gzip", False)
+        tasks = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor, self.operation("export"):
+                # A backup includes the config collection that keys() leaves out
+                keys = self.keys()
+                if self._cfg.CONFIG_COLLECTION in self.mongo().list_collection_names(filter={"name": self._cfg.CONFIG_COLLECTION}):
+                    keys.append(self._cfg.CONFIG_COLLECTION)
+                for key in keys:
+                    collection = self._[key]()
+                    tasks[key] = [
+                        executor.submit(collection.export, parts_path / f"{key}.{i}.part", format, _filter, gzip=compress)
+                        for i, _filter in enumerate(collection.ranges(split))
+                    ]
+            
+            manifest = {
+                "database": self._key,
+                "created": datetime.now().isoformat(),
+                "format": format,
+                "gzip": compress,
+                "base64": to_base64,
+                "collections": {}
+            }
+            for key, futures in tasks.items():
+                parts = [future.result() for future in futures]
+                name = export_name(key, format, gzip=compress, base64=to_base64)
+                with export_stream(path / name, base64=to_base64) as (writer, stream):
+                    for part in parts:
+                        with open(part["path"], "rb") as f:
+                            shutil.copyfileobj(f, writer)
+                        os.remove(part["path"])
+                
+                manifest["collections"][key] = {
+                    "file": name,
+                    "documents": sum(part["documents"] for part in parts),
+                    "parts": len(parts),
+                    "bytes": stream.bytes,
+                    "sha256": stream.sha256()
+                }
+        finally:
+            # Parts of a failed worker must not be joined into the next export to this path
+            shutil.rmtree(parts_path, ignore_errors=True)
+        
+        with open(path / "manifest.json", "w") as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+        
+        return manifest
     
     def load_defaults(self):
         defaults = self.defaults()
         config = self.config()
         if defaults.config_collection_rewrite:
-            for key, value in defaults:
-                if isinstance(value, EndlessDocument):
-                    _value = value()
-                    data = dict(_value.to_dict())
-                    config[key] = data
+            # One bulk write for all defaults rather than an upsert per document
+            with self.batch():
+                for key, value in defaults:
+                    if isinstance(value, EndlessDocument):
+                        _value = value()
+                        data = dict(_value.to_dict())
+                        config[key] = data
         
     #endregion 📌Methods
     
@@ -904,6 +3065,91 @@ class DatabaseLogicContainer():
 
 #region 📌Endless
 
+class EndlessReference():
+    
+    __slots__ = ["_edb", "_ref", "_document", "_owner"]
+    
+    def __init__(self, edb, ref, owner = None):
+        object.__setattr__(self, "_edb", edb)
+        object.__setattr__(self, "_ref", ref)
+        object.__setattr__(self, "_document", None)
+        object.__setattr__(self, "_owner", owner)
+    
+    #region 📌Magic
+    
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+    
+    def __len__(self):
+        return len(self._resolve())
+    
+    def __str__(self) -> str:
+        return str(self._resolve())
+    
+    def __repr__(self) -> str:
+        if self._document is None:
+            return f"🔗{self._ref.collection}/{self._ref.id}"
+        return repr(self._document)
+    
+    def __eq__(self, other):
+        if other is None:
+            return self._resolve() == None
+        if isinstance(other, EndlessReference):
+            return self._ref == other._ref
+        if isinstance(other, EndlessDocument):
+            return self._path() == other().path(True)
+        
+        raise Exception("This type of comparsion is not supported yet")
+    
+    def __iter__(self):
+        return iter(self._resolve())
+    
+    def __getattr__(self, key):
+        if key == "id" or key == "_id":
+            return self._ref.id
+        
+        return getattr(self._resolve(), key)
+    
+    def __setattr__(self, key, value):
+        setattr(self._resolve(), key, value)
+    
+    def __getitem__(self, key):
+        return self._resolve()[key]
+    
+    def __setitem__(self, key, value):
+        self._resolve()[key] = value
+    
+    #endregion 📌Magic
+    
+    #region 📌Methods
+    
+    def _path(self):
+        return f"{self._edb().key()}/{self._ref.collection}/{self._ref.id}"
+    
+    def _bind(self, document):
+        object.__setattr__(self, "_document", document)
+    
+    def _resolve(self):
+        # A bound document is reused while its collection's cache policy holds it fresh, or while it is
+        # newer than the document holding the reference, as after a prefetch. Reloading the holder
+        # makes the reference resolve through the collection again.
+        document = self._document
+        if document is not None:
+            _document = document()
+            owner = self._owner
+            if _document.collection()().fresh(_document):
+                return document
+            if owner is not None and owner._loaded is not None and _document._loaded is not None \
+                and _document._loaded >= owner._loaded:
+                return document
+        
+        with self._edb().operation("dereference"):
+            document = self._edb[self._ref.collection].__getattr__(self._ref.id)
+        object.__setattr__(self, "_document", document)
+        return document
+    
+    #endregion 📌Methods
+
 class EndlessDocument():
     
     def __init__(self, key, obj, parent_logic, virtual = False):
@@ -943,6 +3189,10 @@ class EndlessDocument():
         if "create" in kwargs and kwargs["create"]:
             _self.descendant_create = kwargs["create"] == True            
             ret = True
+        
+        if "prefetch" in kwargs and kwargs["prefetch"]:
+            _self.prefetch(kwargs["prefetch"])
+            ret = True
             
         if descendant_expected is not None:
             document = EndlessDocument(_self.key(), dict(_self.to_dict()), _parent, True)
@@ -987,6 +3237,8 @@ class EndlessDocument():
             return _self.virtual
         if isinstance(other, EndlessDocument):
             return _self.path(True) == other().path(True)
+        if isinstance(other, EndlessReference):
+            return other == self
         
         raise Exception("This type of comparsion is not supported yet")
     
@@ -997,9 +3249,9 @@ class EndlessDocument():
                 yield key, self.__dict__[key]
             else:
                 path = f"{_self.path(True)}/{key}"
-                documents =_self.edb()().documents()
-                if path in documents:
-                    yield key, documents[path]
+                document = _self.edb()().documents().get(path)
+                if document is not None:
+                    yield key, document
                 else:
                     raise Exception(f"Property {key} not found in {self}")
             
@@ -1007,7 +3259,7 @@ class EndlessDocument():
         if key == "id" or key == "_id":
             raise Exception(f"Id is read-only")
         
-        valid_types = [EndlessDocument, str, int, float, bool, dict, list, bytes, bytearray, datetime, uuid.UUID, type(None)]
+        valid_types = [EndlessDocument, EndlessReference, str, int, float, bool, dict, list, bytes, bytearray, datetime, uuid.UUID, type(None)]
         if not type(value) in valid_types:
             raise Exception(f"Value must be instance of {valid_types}")
              
@@ -1037,6 +3289,10 @@ class EndlessDocument():
             if _self.descendant_rewrite:
                 _self.collection().set(_self.path(), value, descendant_expected)
                 return value
+        
+        if key not in self.__dict__ and _self.fields() is not None \
+            and not _self.virtual and not _self.covers([_self.field(key)]):
+            _self.load([key])
             
         if key in self.__dict__:
             if _self.descendant_exception and descendant_expected_is_type:
@@ -1048,7 +3304,7 @@ class EndlessDocument():
         elif _self.descendant_exception:
             raise Exception(f"Property {key} not found in {self}")
         
-        return _self.descendant(key, None, True)
+        return _self.descendant(key, {}, True)
     
     def __getitem__(self, key):
         if isinstance(key, int):
@@ -1096,6 +3352,42 @@ class EndlessCollection():
         if "static" in kwargs and kwargs["static"]:
             _self.static = kwargs["static"] == True
             ret = True
+        
+        if "cache" in kwargs and kwargs["cache"]:
+            if kwargs["cache"] not in CACHE_POLICIES:
+                raise Exception(f"Cache policy must be one of {CACHE_POLICIES}")
+            _self.cache = kwargs["cache"]
+            ret = True
+        
+        if "ttl" in kwargs and kwargs["ttl"]:
+            _self.cache = "ttl"
+            _self.ttl = kwargs["ttl"]
+            ret = True
+        
+        if "batch_size" in kwargs and kwargs["batch_size"]:
+            _self.batch_size = kwargs["batch_size"]
+            ret = True
+        
+        if "count" in kwargs and kwargs["count"]:
+            if kwargs["count"] not in COUNT_STRATEGIES:
+                raise Exception(f"Count strategy must be one of {COUNT_STRATEGIES}")
+            _self.count = kwargs["count"]
+            ret = True
+        
+        if "read_preference" in kwargs and kwargs["read_preference"]:
+            _self.read_preference = kwargs["read_preference"]
+            _self._reader = None
+            _self.reader()
+            ret = True
+        
+        if "read_concern" in kwargs and kwargs["read_concern"]:
+            _self.read_concern = kwargs["read_concern"]
+            _self._reader = None
+            _self.reader()
+            ret = True
+        
+        if "fields" in kwargs and kwargs["fields"]:
+            return _self.view(kwargs["fields"])
             
         if ret:
             return self
@@ -1113,11 +3405,16 @@ class EndlessCollection():
     def __len__(self):
         _self = self.__dict__["***"]
         return _self.len()
+    
+    def __contains__(self, key):
+        _self = self.__dict__["***"]
+        return _self.contains(key)
             
     def __str__(self) -> str:
         _self = self.__dict__["***"]
         _str = f"{_self.key()}"
-        _str += "{" + f"ℓ{_self.len()}" + "}"
+        count = _self.len(offline=True)
+        _str += "{" + f"ℓ{'?' if count is None else count}" + "}"
         
         return _str    
     
@@ -1127,8 +3424,12 @@ class EndlessCollection():
     
     def __iter__(self):
         _self = self.__dict__["***"]
-        for key in _self.keys():
-            yield key, self.__getattr__(key)
+        if _self.mongo() is None:
+            for key in _self.keys():
+                yield key, self.__getattr__(key)
+        else:
+            for document in _self.find():
+                yield document().key(), document
                    
     def __getattr__(self, key):
         _self = self.__dict__["***"]
@@ -1141,36 +3442,49 @@ class EndlessCollection():
             return None
         else:
             _path = f"{_self.path(True)}/{key}"
-            documents = _self._edb().documents()
+            edb = _self._edb()
+            documents = edb.documents()
             #_path = f"{self._key}.{path}"
-            if _path in documents:
-                document = documents[_path]
-                document().reload()
+            fields = _self.fields
+            document = documents.get(_path)
+            if document is not None:
+                if fields is None:
+                    if document().fields() is not None:
+                        document().load()
+                    elif not _self.fresh(document()):
+                        edb.coalesce(_path, document().reload)
+                elif not _self.fresh(document()) or not document().covers(fields):
+                    document().load(fields)
                 return document
             
-            _obj = collection.find_one({"_id": key})
-            defaults = _self.defaults
-            if _obj is None and defaults is not None:
-                default_value = _self.defaults[key]
-                if default_value is not None:
-                    if isinstance(default_value, EndlessDocument):
-                        _path = default_value().path()
-                        _data = dict(default_value().to_dict())
-                        _self.set(_path, _data)
-                        #collection.update_one({ "_id": key }, _data, upsert=True) 
-                        _obj = collection.find_one({"_id": key})
-                    else:
-                        _self.set(_path, default_value)
-                        return default_value              
-            
-            #path = f"{_self.key()}/{key}"
-            if _obj is None:
-                document = _self.descendant(key, None, True)            
-            else:    
-                document = _self.descendant(key, _obj)
+            def load():
+                _obj = _self.reader().find_one({"_id": key}, _self.projection())
+                defaults = _self.defaults
+                if _obj is None and defaults is not None:
+                    default_value = _self.defaults[key]
+                    if default_value is not None:
+                        if isinstance(default_value, EndlessDocument):
+                            _default_path = default_value().path()
+                            _data = dict(default_value().to_dict())
+                            _self.set(_default_path, _data)
+                            #collection.update_one({ "_id": key }, _data, upsert=True) 
+                            _obj = collection.find_one({"_id": key})
+                        else:
+                            _self.set(_path, default_value)
+                            return default_value              
                 
-            documents[_path] = document
-            return document            
+                #path = f"{_self.key()}/{key}"
+                if _obj is None:
+                    document = _self.descendant(key, {}, True)            
+                else:    
+                    document = _self.descendant(key, _obj)
+                    if fields is not None:
+                        document()._fields = list(fields)
+                    
+                return document
+            
+            with edb.operation("load"):
+                return edb.coalesce(_path, load)
     
     def __setattr__(self, key, value):
         _self = self.__dict__["***"]
@@ -1182,11 +3496,17 @@ class EndlessCollection():
             raise Exception(f"{self} is read-only")
         
         if isinstance(value, dict):
-            collection.update_one({'_id': key }, {"$set": value}, upsert=True)            
+            if _self.batching():
+                _self.stage(key, {"$set": value})
+                return
+            
+            result = collection.update_one({'_id': key }, {"$set": value}, upsert=True)            
+            if result.upserted_id is not None:
+                _self.counted(1)
             _path = f"{_self.path(True)}/{key}"
-            documents = _self.edb()().documents()
-            if _path in documents:
-                documents[_path]().reload()                         
+            document = _self.edb()().documents().get(_path)
+            if document is not None:
+                document().reload(primary=True)                         
         else:
             raise Exception(f"You must pass dict value with filled _id pproperty {self}")
     
@@ -1242,8 +3562,8 @@ class EndlessCollection():
    
 class EndlessDatabase():
     
-    def __init__(self, url = None, host = None, port = None, user = None, password = None):
-        self.__dict__["***"] = DatabaseLogicContainer(self, url, host, port, user, password)        
+    def __init__(self, url = None, host = None, port = None, user = None, password = None, threadsafe = None, database = None):
+        self.__dict__["***"] = DatabaseLogicContainer(self, url, host, port, user, password, threadsafe, database)        
        
     def __call__(self, *args, **kwargs) -> DatabaseLogicContainer:
         _self = self.__dict__["***"]       
@@ -1258,7 +3578,7 @@ class EndlessDatabase():
             ret = True
         
         if ret:
-            self
+            return self
         else:
             return _self
     
@@ -1272,7 +3592,8 @@ class EndlessDatabase():
     def __str__(self) -> str:
         _self = self.__dict__["***"]
         _str = f"{_self.key()}"
-        _str += "{" + f"ℓ{_self.len()}" + "}"
+        count = _self.len(offline=True)
+        _str += "{" + f"ℓ{'?' if count is None else count}" + "}"
         return _str
     
     def __repr__(self) -> str:
@@ -1309,7 +3630,7 @@ class EndlessDatabase():
            
         collection = EndlessCollection(key, self)        
         if not _self.debug:
-            collections[key] = collection
+            collection = collections.setdefault(key, collection)
                     
         return collection
     
@@ -1347,4 +3668,708 @@ class EndlessDatabase():
         for key in _self.keys():
             yield key, self.__getattr__(key)  
 
-#endregion 📌Endless
\ No newline at end of file
+#endregion 📌Endless
+
+#region 📌Async
+
+class AsyncDocumentLogicContainer():   
+    
+    __slots__ = ["_", "__", "_key", "_keys", "_parent_logic", "_loaded", "_flags"]
+    
+    #region 📌Magic
+    
+    def __init__(self, _, key, obj, parent_logic, virtual):
+        self._ = _
+        self.__ = _.__dict__
+        self._key = key
+        self._keys = []
+        self._parent_logic = parent_logic
+        self._loaded = None
+        self._flags = 0
+        
+        self.virtual = virtual
+        self.protected = parent_logic.protected
+        
+        self._reload(obj)
+    
+    virtual = flag(FLAG_VIRTUAL)
+    protected = flag(FLAG_PROTECTED)
+    
+    def __call__(self):
+        return self._
+    
+    def __repr__(self) -> str:
+        return f"🧩logic({self.repr()})"
+    
+    #endregion 📌Magic
+    
+    #region 📌Methods
+    
+    def _reload(self, obj):
+        if isinstance(self._parent_logic, AsyncCollectionLogicContainer):
+            self._loaded = time.monotonic()
+        
+        keys = []
+        for _key in obj:
+            value = obj[_key]
+            if isinstance(_key, str):
+                _key = sys.intern(_key)
+            keys.append(_key)
+            
+            if isinstance(value, dict):
+                document = self.__.get(_key)
+                if isinstance(document, AsyncEndlessDocument):
+                    document()._reload(value)
+                else:
+                    self.__[_key] = AsyncEndlessDocument(_key, value, self, self.virtual)
+            elif isinstance(value, ObjectId):                   
+                self.__[_key] = str(value)
+            else:
+                self.__[_key] = value
+        
+        for _key in set(self._keys).difference(keys):
+            self.__.pop(_key, None)
+        self._keys = keys
+    
+    def repr(self, srepr = None) -> str:
+        repr = "📑"
+        if self.virtual:
+            repr += "🆕"
+        
+        if self.protected:
+            repr += "🔒"
+        else:
+            repr += "🔓"
+        
+        repr += f"{self._key}"            
+        repr += "{" + f"ℓ{self.len()}" + "}"
+        
+        if srepr is not None:
+            repr = f'{repr}/{srepr}'
+        
+        return self._parent_logic.repr(repr)
+    
+    def len(self):
+        return len(self._keys)
+    
+    def key(self):
+        return self._key
+    
+    def keys(self):
+        return self._keys
+    
+    def relative_path(self, current = None):
+        if current is None:
+            _path = str(self._key)
+        else:    
+            _path = f"{self._key}/{current}"
+        if isinstance(self._parent_logic, AsyncCollectionLogicContainer):
+            return  _path
+        
+        return f"{self._parent_logic.relative_path(_path)}"
+    
+    def path(self, full = False):
+        if full:
+            return f"{self._parent_logic.path(True)}/{self._key}"
+        else:
+            return self.relative_path()
+    
+    def parent(self):
+        return self._parent_logic()
+    
+    def root(self):
+        if isinstance(self._parent_logic, AsyncCollectionLogicContainer):
+            return self._
+        
+        return self._parent_logic.root()
+    
+    def collection(self):
+        if isinstance(self._parent_logic, AsyncCollectionLogicContainer):
+            return self._parent_logic()
+        
+        return self._parent_logic.collection()
+    
+    def edb(self):
+        return self.collection()().edb()
+    
+    def mongo(self):
+        return self.collection()().mongo()
+    
+    def field(self, key = None):
+        _path = self.relative_path().split("/")[1:]
+        if key is not None:
+            _path.append(str(key))
+        return ".".join(_path)
+    
+    async def reload(self):
+        root = self.root()
+        await root().collection()().get(root().key(), True)
+        return self._
+    
+    async def get(self, path):
+        value = self._
+        for key in str(path).replace("/", ".").split("."):
+            if isinstance(value, bson.dbref.DBRef):
+                value = await self.edb()().dereference(value)
+            if not isinstance(value, AsyncEndlessDocument):
+                return None
+            value = value[key]
+        
+        if isinstance(value, bson.dbref.DBRef):
+            value = await self.edb()().dereference(value)
+        return value
+    
+    async def set(self, path, value):
+        root = self.root()
+        field = self.field(path)
+        await root().collection()().set(f"{root().key()}.{field}", value)
+    
+    async def delete(self):
+        root = self.root()
+        if root is self._:
+            await self.collection()().delete(self._key)
+        else:
+            await root().collection()().unset(root().key(), self.field())
+    
+    def to_ref(self):
+        return { 
+            "$ref": self.collection()().key(), 
+            "$id": self.root()().key()
+        }
+        
+    def to_dict(self, *args, **kwargs):
+        exclude = kwargs.get("exclude", [])
+        include = kwargs.get("include", [])
+        ref_to_id = kwargs.get("ref_to_id", False)
+        
+        for key in self._keys:
+            if key == "_id":
+                _key = "id"
+            else:
+                _key = key
+            if _key in exclude:
+                continue
+            
+            if len(include) > 0 and _key not in include:
+                continue
+            
+            value = self.__[key]
+            if isinstance(value, bson.dbref.DBRef) and ref_to_id:
+                yield (_key, value.id)
+            elif isinstance(value, AsyncEndlessDocument):
+                yield (_key, dict(value().to_dict(*args, **kwargs)))
+            else:
+                yield (_key, value)
+    
+    def to_json(self, *args, **kwargs):
+        return json.dumps(dict(self.to_dict(*args, **kwargs)), default=json_default_encoder, ensure_ascii=False)
+    
+    #endregion 📌Methods
+
+class AsyncCollectionLogicContainer():
+    
+    #region 📌Magic
+    
+    def __init__(self, _, edb, key, _mongo = None):
+        self.protected = False
+        self.debug = False
+        self.cache = None
+        self.ttl = None
+        self.batch_size = None
+        
+        self._ = _
+        self.__ = _.__dict__
+        self._edb = edb
+        self._key = key
+        self._path = f"{edb().key()}/{key}"
+        if _mongo is None:
+            self._collection = edb().mongo()[key]
+        else:
+            self._collection = _mongo[key]
+    
+    def __call__(self):
+        return self._
+    
+    def __repr__(self) -> str:
+        return f"🧩logic:({self.repr()})"
+    
+    #endregion 📌Magic
+    
+    #region 📌Methods
+    
+    def repr(self, srepr = None):
+        repr = ""
+        if self.debug:
+            repr += "🐞"
+        
+        repr += "📚"
+        if self.protected:
+            repr += "🔒"
+        else:
+            repr += "🔓"
+        repr += f"{self._key}"
+        
+        if srepr is not None:
+            repr += f'/{srepr}'        
+        
+        return self._edb().repr(repr)
+    
+    def key(self):
+        return self._key
+    
+    def path(self, full = True):
+        if full:
+            return self._path
+        else:
+            return self._key
+    
+    def parent(self):
+        return self._edb
+    
+    def edb(self):
+        return self._edb
+    
+    def mongo(self):
+        return self._collection
+    
+    def policy(self):
+        if self.cache is not None:
+            return self.cache
+        
+        return self._edb().cfg().CACHE_POLICY or "always"
+    
+    def fresh(self, document):
+        if self.debug or document._loaded is None:
+            return False
+        
+        policy = self.policy()
+        if policy == "never":
+            return True
+        
+        if policy == "ttl":
+            if self.ttl is not None:
+                ttl = self.ttl
+            else:
+                ttl = self._edb().cfg().CACHE_TTL or 0
+            return time.monotonic() - document._loaded < ttl
+        
+        return False
+    
+    def cursor_size(self):
+        if self.batch_size is not None:
+            return self.batch_size
+        
+        return self._edb().cfg().CURSOR_BATCH_SIZE or 0
+    
+    def hydrate(self, obj, key = None):
+        if obj is not None:
+            key = obj["_id"]
+        _path = f"{self._path}/{key}"
+        documents = self._edb().documents()
+        if _path in documents:
+            document = documents[_path]
+            _document = document()
+            if obj is None:
+                _document.virtual = True
+            else:
+                _document.virtual = False
+                _document._reload(obj)
+            _document._loaded = time.monotonic()
+            return document
+        
+        if obj is None:
+            document = AsyncEndlessDocument(key, {}, self, True)
+            document()._loaded = time.monotonic()
+        else:
+            document = AsyncEndlessDocument(key, obj, self)
+        if not self.debug:
+            documents[_path] = document
+        return document
+    
+    async def get(self, key, reload = False):
+        try:
+            key = int(key)
+        except:
+            pass
+        
+        _path = f"{self._path}/{key}"
+        edb = self._edb()
+        documents = edb.documents()
+        if not reload and _path in documents:
+            document = documents[_path]
+            if self.fresh(document()):
+                return document
+        
+        return await edb.coalesce(_path, partial(self._get, key))
+    
+    async def _get(self, key):
+        obj = await self._collection.find_one({"_id": key})
+        return self.hydrate(obj, key)
+    
+    async def set(self, path, value):
+        if self.protected:
+            raise Exception(f"{self} is protected and read-only")
+        
+        _path = str(path).split(".")
+        try:
+            _id = int(_path[0])
+        except:
+            _id = _path[0]
+        
+        value = self.encode(value)
+        if len(_path) == 1:
+            _data = { "$set": value }
+        else:
+            _data = { "$set": { ".".join(_path[1:]): value } }
+        
+        await self._collection.update_one({ "_id": _id }, _data, upsert=True)
+        await self._refresh(_id)
+    
+    def encode(self, value):
+        if isinstance(value, AsyncEndlessDocument):
+            if value().root() is value:
+                return value().to_ref()
+            return dict(value().to_dict())
+        if isinstance(value, dict):
+            return {key: self.encode(_value) for key, _value in value.items()}
+        if isinstance(value, list):
+            return [self.encode(_value) for _value in value]
+        return value
+    
+    async def unset(self, _id, field):
+        if self.protected:
+            raise Exception(f"{self} is protected and read-only")
+        
+        await self._collection.update_one({ "_id": _id }, { "$unset": { field: "" } })
+        await self._refresh(_id)
+    
+    async def _refresh(self, _id):
+        # Writes bypass coalescing so a read started before the write is never reused
+        if f"{self._path}/{_id}" in self._edb().documents():
+            self.hydrate(await self._collection.find_one({ "_id": _id }), _id)
+    
+    async def delete(self, key = None):
+        if self.protected:
+            raise Exception(f"{self} is protected and read-only")
+        
+        documents = self._edb().documents()
+        if key is None:
+            await self._collection.drop()
+            _path = f"{self._path}/"
+            for path, document in documents.items():
+                if path.startswith(_path):
+                    documents.pop(path, None)
+                    document().virtual = True
+        else:
+            await self._collection.delete_one({ "_id": key })
+            document = documents.pop(f"{self._path}/{key}", None)
+            if document is not None:
+                document().virtual = True
+    
+    async def keys(self, after = None, limit = 0):
+        for _filter in id_filters(after):
+            cursor = self._collection.find(_filter, {"_id": 1}, sort=[("_id", 1)], limit=limit, batch_size=self.cursor_size())
+            async for obj in cursor:
+                yield obj["_id"]
+                if limit > 0:
+                    limit -= 1
+                    if limit == 0:
+                        return
+    
+    async def contains(self, key):
+        return await self._collection.find_one({"_id": key}, {"_id": 1}) is not None
+    
+    async def count(self, filter = None):
+        return await self._collection.count_documents(filter or {})
+    
+    async def find(self, filter = None, sort = None, skip = 0, limit = 0, batch_size = None, hint = None):
+        if batch_size is None:
+            batch_size = self.cursor_size()
+        
+        cursor = self._collection.find(filter or {}, sort=sort, skip=skip, limit=limit, batch_size=batch_size, hint=hint)
+        async for obj in cursor:
+            yield self.hydrate(obj)
+    
+    async def find_one(self, filter = None, sort = None, hint = None):
+        obj = await self._collection.find_one(filter or {}, sort=sort, hint=hint)
+        if obj is None:
+            return None
+        
+        return self.hydrate(obj)
+    
+    #endregion 📌Methods
+
+class AsyncDatabaseLogicContainer():
+    
+    #region 📌Magic
+    
+    def __init__(self, _, url = None, host = "localhost", port = 27017, user = "", password = "", database = None):
+        self._cfg = EndlessConfiguration()
+        self.debug = False
+        self._ = _
+        self._collections = {}
+        self._documents = IdentityMap(
+            self._cfg.CACHE_MAX_DOCUMENTS, 
+            self._cfg.CACHE_MAX_BYTES, 
+            self._cfg.CACHE_MAX_VIRTUAL, 
+            self._cfg.CACHE_EVICTION or "lru"
+        )
+        self._pending = {}
+        
+        self._url = self.url_info(url or self._cfg.MONGO_URI)
+        self._key = database or self._cfg.MONGO_DATABASE
+        
+        self._mongo = pymongo.AsyncMongoClient(self._url["url"])
+        self._edb = self._mongo[self._key]
+    
+    def __call__(self):
+        return self._
+    
+    def __repr__(self) -> str:
+        return f"🧩logic:({self.repr()})"
+    
+    #endregion 📌Magic
+    
+    #region 📌Methods
+    
+    def repr(self, srepr = None):
+        repr = ""
+        if self.debug:
+            repr += "🐞"
+        repr += f"💿{self._key}"
+        
+        if srepr is None:
+            return repr
+        else:
+            return f'{repr}/{srepr}'
+    
+    def key(self):
+        return self._key
+    
+    def mongo(self):
+        return self._edb
+    
+    def cfg(self):
+        return self._cfg
+    
+    def documents(self):
+        return self._documents
+    
+    def collections(self):
+        return self._collections
+    
+    def url_info(self, url):
+        pattern = r"(?i)^mongodb\:\/\/(?P<user>.*):(?P<password>.*)\@(?P<host>.*)\:(?P<port>\d+)\/(?P<database>.*)?\?(?P<paramaters>.*)?$"
+        masked = re.sub(pattern, partial(re_mask_subgroup, "password", "*"), url)
+        
+        return {"url": url, "masked": masked}
+    
+    async def coalesce(self, path, load):
+        # Concurrent lookups of the same document share a single query
+        pending = self._pending.get(path)
+        if pending is None:
+            pending = asyncio.ensure_future(load())
+            self._pending[path] = pending
+            
+            def done(future):
+                if self._pending.get(path) is future:
+                    del self._pending[path]
+            
+            pending.add_done_callback(done)
+        
+        return await asyncio.shield(pending)
+    
+    async def dereference(self, ref):
+        document = await self._[ref.collection]().get(ref.id)
+        if document == None:
+            return None
+        
+        return document
+    
+    async def keys(self):
+        _filter = {"name": {"$regex": r"^(?!^%s$).+$" % self._cfg.CONFIG_COLLECTION}}
+        return await self.mongo().list_collection_names(filter=_filter)
+    
+    async def close(self):
+        await self._mongo.close()
+    
+    #endregion 📌Methods
+
+class AsyncEndlessDocument():
+    
+    def __init__(self, key, obj, parent_logic, virtual = False):
+        self.__dict__["***"] = AsyncDocumentLogicContainer(self, key, obj, parent_logic, virtual)
+    
+    #region 📌Magic
+    
+    def __call__(self) -> AsyncDocumentLogicContainer:
+        return self.__dict__["***"]
+    
+    def __len__(self):                
+        return self().len()
+    
+    def __str__(self) -> str:                
+        _self = self.__dict__["***"]
+        _str = f"{_self.key()}"
+        _str += "{" + f"ℓ{_self.len()}" + "}"
+        if _self.virtual:
+            _str += "*"
+        return _str
+    
+    def __repr__(self) -> str:
+        return self.__dict__["***"].repr()
+    
+    def __eq__(self, other):
+        _self = self.__dict__["***"]
+        if other is None:
+            return _self.virtual
+        if isinstance(other, AsyncEndlessDocument):
+            return _self.path(True) == other().path(True)
+        
+        raise Exception("This type of comparsion is not supported yet")
+    
+    def __iter__(self):
+        _self = self.__dict__["***"]
+        for key in _self.keys():
+            yield key, self.__dict__[key]
+    
+    def __contains__(self, key):
+        return key in self.__dict__["***"].keys()
+    
+    def __getattr__(self, key):
+        if key == "id":
+            key = "_id"
+        
+        if key in self.__dict__:
+            return self.__dict__[key]
+        
+        try:
+            key = int(key)
+        except:
+            pass
+        
+        # Async documents hold loaded data only, missing keys never hit the database
+        return self.__dict__.get(key)
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            path = key.split("/", 1)
+            if len(path) > 1:
+                value = self.__getattr__(path[0])
+                if isinstance(value, AsyncEndlessDocument):
+                    return value[path[1]]
+                return None
+        
+        return self.__getattr__(key)
+    
+    def __setattr__(self, key, value):
+        raise Exception(f"{self} is changed with await document().set({key!r}, value)")
+    
+    def __setitem__(self, key, value):
+        self.__setattr__(key, value)
+    
+    #endregion 📌Magic
+
+class AsyncEndlessCollection():
+    
+    def __init__(self, key, edb, _database = None):
+        self.__dict__["***"] = AsyncCollectionLogicContainer(self, edb, key, _database)
+    
+    #region 📌Magic
+    
+    def __call__(self, *args, **kwargs) -> AsyncCollectionLogicContainer:
+        _self = self.__dict__["***"]
+        
+        if "cache" in kwargs:
+            if kwargs["cache"] not in CACHE_POLICIES:
+                raise Exception(f"Cache policy must be one of {CACHE_POLICIES}")
+            _self.cache = kwargs["cache"]
+        
+        if "ttl" in kwargs and kwargs["ttl"]:
+            _self.cache = "ttl"
+            _self.ttl = kwargs["ttl"]
+        
+        if "batch_size" in kwargs:
+            _self.batch_size = kwargs["batch_size"]
+        
+        if "protected" in kwargs:
+            _self.protected = kwargs["protected"] == True
+        
+        if "debug" in kwargs:
+            _self.debug = kwargs["debug"] == True
+        
+        if len(kwargs) > 0:
+            return self
+        
+        return _self
+    
+    def __str__(self) -> str:
+        return f"{self.__dict__['***'].key()}"
+    
+    def __repr__(self) -> str:
+        return self.__dict__["***"].repr()
+    
+    async def __aiter__(self):
+        _self = self.__dict__["***"]
+        async for document in _self.find():
+            yield document().key(), document
+    
+    def __getattr__(self, key):
+        raise Exception(f"Documents of {self} are read with await {self}().get({key!r})")
+    
+    def __getitem__(self, key):
+        return self.__getattr__(key)
+    
+    def __setattr__(self, key, value):
+        raise Exception(f"Documents of {self} are written with await {self}().set({key!r}, value)")
+    
+    def __setitem__(self, key, value):
+        self.__setattr__(key, value)
+    
+    #endregion 📌Magic
+
+class AsyncEndlessDatabase():
+    
+    def __init__(self, url = None, host = None, port = None, user = None, password = None, database = None):
+        self.__dict__["***"] = AsyncDatabaseLogicContainer(self, url, host, port, user, password, database)
+    
+    #region 📌Magic
+    
+    def __call__(self, *args, **kwargs) -> AsyncDatabaseLogicContainer:
+        _self = self.__dict__["***"]
+        if "debug" in kwargs:
+            _self.debug = kwargs["debug"] == True
+            return self
+        
+        return _self
+    
+    def __str__(self) -> str:
+        return f"{self.__dict__['***'].key()}"
+    
+    def __repr__(self) -> str:
+        return self.__dict__["***"].repr()
+    
+    def __getattr__(self, key):
+        _self = self.__dict__["***"]
+        if key in self.__dict__:
+            return self.__dict__[key]
+        
+        collections = _self.collections()
+        if not _self.debug and key in collections:
+            return collections[key]     
+           
+        collection = AsyncEndlessCollection(key, self)        
+        if not _self.debug:
+            collections[key] = collection
+                    
+        return collection
+    
+    def __getitem__(self, key):
+        return self.__getattr__(key)
+    
+    def __setattr__(self, key, value):
+        raise Exception(f"This is edb root and it is read-only")
+    
+    #endregion 📌Magic
+
+#endregion 📌Async